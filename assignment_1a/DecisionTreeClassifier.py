@@ -1,31 +1,69 @@
 """ This file contains the implementation of a Decision Tree to classify dialogue acts."""
 
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import sklearn
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import accuracy_score, classification_report
-from assignment_1a.data_processing import load_data, remove_duplicates, preprocess_data
+from assignment_1a.data_processing import load_data, load_deduplicated_data, load_features, preprocess_data
+
+# Bump this whenever the layout of the saved model bundle changes
+MODEL_VERSION = 1
 
 
 class DecisionTreeDialogClassifier:
-    def __init__(self, filepath):
+    def __init__(self, filepath, model_dir='../models'):
         self.filepath = filepath
-        self.labeled_data = load_data(filepath)
-        self.deduplicated_data = remove_duplicates(self.labeled_data)
+        self.model_dir = model_dir
+        self.hyperparameters = {'random_state': 42, 'max_depth': 20, 'min_samples_split': 5, 'criterion': 'entropy'}
+        self.test_size = 0.15
+        self._labeled_data = None
+        self._deduplicated_data = None
         self.vectorizer = None
         self.clf_tree = None
         self.print_output = False
+        # Held while the model is loaded or trained, the dialog system can ask for it from two threads at once
+        self.load_lock = threading.Lock()
         self.X_train = None
         self.X_test = None
         self.y_train = None
         self.y_test = None
 
+    @property
+    def labeled_data(self):
+        """Load the data only when it is needed, so loading a saved model skips parsing the dataset."""
+        if self._labeled_data is None:
+            self._labeled_data = load_data(self.filepath)
+        return self._labeled_data
+
+    @property
+    def deduplicated_data(self):
+        if self._deduplicated_data is None:
+            self._deduplicated_data = load_deduplicated_data(self.filepath)
+        return self._deduplicated_data
+
     def train(self, labeled_lines):
         """Train the Decision Tree model."""
-        X, labels, self.vectorizer = preprocess_data(labeled_lines, method="count")
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(X, labels, test_size=0.15, random_state=42)
+        self.fit(*preprocess_data(labeled_lines, method="count"))
+
+    def train_cached(self, deduplicated):
+        """Train the Decision Tree model on the cached count matrix of the original or deduplicated data."""
+        self.fit(*load_features(self.filepath, method="count", deduplicated=deduplicated))
 
-        self.clf_tree = DecisionTreeClassifier(random_state=42, max_depth=20, min_samples_split=5, criterion='entropy')
-        self.clf_tree.fit(self.X_train, self.y_train)
+    def fit(self, X, labels, vectorizer):
+        X_train, X_test, y_train, y_test = train_test_split(X, labels, test_size=self.test_size, random_state=42)
+        clf_tree = DecisionTreeClassifier(**self.hyperparameters)
+        clf_tree.fit(X_train, y_train)
+
+        # Only publish the model once it is fitted, another thread may be classifying with the previous one
+        self.X_train, self.X_test, self.y_train, self.y_test = X_train, X_test, y_train, y_test
+        self.vectorizer = vectorizer
+        self.clf_tree = clf_tree
 
     def evaluate(self, description):
         """Evaluate the Decision Tree model."""
@@ -40,25 +78,97 @@ class DecisionTreeDialogClassifier:
     def run(self):
         """Run training and evaluation for both original and deduplicated data."""
         # Train and evaluate on original data
-        self.train(self.labeled_data)
+        self.train_cached(deduplicated=False)
         self.evaluate("Original Data")
 
         # Train and evaluate on deduplicated data
-        self.train(self.deduplicated_data)
+        self.train_cached(deduplicated=True)
         self.evaluate("Deduplicated Data")
 
+    def model_hash(self):
+        """Hash the dataset and the hyperparameters, so a saved model is only reused when neither changed."""
+        digest = hashlib.sha256()
+        with open(self.filepath, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        # A bundle pickled by another scikit-learn version may not load or may predict differently, so retrain instead
+        settings = {'version': MODEL_VERSION, 'hyperparameters': self.hyperparameters, 'test_size': self.test_size,
+                    'sklearn': sklearn.__version__}
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def model_path(self, model_hash):
+        return os.path.join(self.model_dir, f"decision_tree_v{MODEL_VERSION}_{model_hash[:16]}.pkl")
+
+    def save_model(self, model_hash=None):
+        """Write the fitted vectorizer and tree to a versioned bundle on disk."""
+        model_hash = model_hash or self.model_hash()
+        os.makedirs(self.model_dir, exist_ok=True)
+        bundle = {'version': MODEL_VERSION, 'hash': model_hash, 'vectorizer': self.vectorizer, 'clf_tree': self.clf_tree}
+
+        # Write to a temporary file of its own first, so a crash never leaves a half written bundle behind and two
+        # processes saving at once never replace each other's file
+        path = self.model_path(model_hash)
+        fd, tmp_path = tempfile.mkstemp(dir=self.model_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return path
+
+    def load_model(self, model_hash=None):
+        """Load a saved bundle, returns False if there is no bundle for the current dataset and settings."""
+        model_hash = model_hash or self.model_hash()
+        try:
+            with open(self.model_path(model_hash), 'rb') as f:
+                bundle = pickle.load(f)
+        except Exception:
+            # Missing, truncated or written by incompatible library versions, all of them mean the bundle is stale
+            return False
+
+        if bundle.get('version') != MODEL_VERSION or bundle.get('hash') != model_hash:
+            return False
+
+        self.vectorizer = bundle['vectorizer']
+        self.clf_tree = bundle['clf_tree']
+        return True
+
+    def load_or_train(self):
+        """
+        Load the saved model, only retrain on the deduplicated data when the dataset or settings changed.
+        Threads that call this at the same time wait for the first one, and nothing is done once a model is loaded.
+        """
+        with self.load_lock:
+            if self.clf_tree is not None:
+                return
+            model_hash = self.model_hash()
+            if not self.load_model(model_hash):
+                self.train_cached(deduplicated=True)
+                self.save_model(model_hash)
+
 
 # Usage Example
 decision_tree_classifier = DecisionTreeDialogClassifier('../data/dialog_acts.dat')
 
-# Print outputs if running as a script
+# Print outputs and retrain if running as a script, otherwise the saved model is loaded on first use
 if __name__ == "__main__":
     decision_tree_classifier.print_output = True
-else:
-    decision_tree_classifier.print_output = False
+    decision_tree_classifier.run()
+    decision_tree_classifier.save_model()
+
+    vectorizer = decision_tree_classifier.vectorizer
+    clf_tree = decision_tree_classifier.clf_tree
 
-decision_tree_classifier.run()
 
-# Expose vectorizer and clf_tree for dialog system
-vectorizer = decision_tree_classifier.vectorizer
-clf_tree = decision_tree_classifier.clf_tree
+def __getattr__(name):
+    """Expose vectorizer and clf_tree for dialog system, importing this module does not load or train anything."""
+    if name in ('vectorizer', 'clf_tree'):
+        if decision_tree_classifier.clf_tree is None:
+            decision_tree_classifier.load_or_train()
+        # Plain module attributes from now on, so later lookups skip this function
+        globals().update(vectorizer=decision_tree_classifier.vectorizer, clf_tree=decision_tree_classifier.clf_tree)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
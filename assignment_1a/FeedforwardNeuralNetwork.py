@@ -5,13 +5,13 @@ import tensorflow as tf
 from tensorflow.keras import layers, models
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
-from data_processing import load_data, remove_duplicates
+from data_processing import load_data, load_deduplicated_data
 
 
 class FeedforwardNeuralNetworkClassifier:
     def __init__(self, filepath, max_words=10000, max_len=128):
         self.data = load_data(filepath)
-        self.deduplicated_data = remove_duplicates(self.data)
+        self.deduplicated_data = load_deduplicated_data(filepath)
         self.max_words = max_words
         self.max_len = max_len
         self.tokenizer = self.create_tokenizer(self.data)
@@ -77,4 +77,5 @@ class FeedforwardNeuralNetworkClassifier:
 
 # Usage Example
 fnn_classifier = FeedforwardNeuralNetworkClassifier('../data/dialog_acts.dat')
-fnn_classifier.run()
+if __name__ == "__main__":
+    fnn_classifier.run()
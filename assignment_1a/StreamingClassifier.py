@@ -0,0 +1,103 @@
+""" This file contains an out-of-core classifier of dialogue acts, trained on streamed chunks of the dataset."""
+
+import random
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.naive_bayes import MultinomialNB
+from data_processing import fingerprint, iter_chunks, iter_records
+
+# Incremental learners that can stand in for SVC and DecisionTreeClassifier, all of them support partial_fit
+MODELS = {
+    'svm': lambda: SGDClassifier(loss='hinge', alpha=1e-5, random_state=42),
+    'logistic': lambda: SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42),
+    'naive_bayes': lambda: MultinomialNB(alpha=0.01),
+}
+
+
+class StreamingDialogClassifier:
+    """
+    Trains on a dialog acts file of any size: the features are hashed, so there is no vocabulary to hold, and the
+    model is updated one chunk at a time with partial_fit, so only a chunk of the file is in memory at once.
+    """
+
+    def __init__(self, filepath, model='svm', n_features=2 ** 18, chunk_size=10000, epochs=5, test_size=0.15):
+        self.filepath = filepath
+        self.model = model
+        self.chunk_size = chunk_size
+        self.epochs = epochs
+        self.test_size = test_size
+        # Stateless, the same sentence always maps to the same columns, non-negative so naive bayes can use it too
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, lowercase=True)
+        self.classifier = None
+        self.classes = None
+        self.print_output = False
+
+    def split(self, deduplicated=False, test=False):
+        """
+        Yield the chunks of the train or test part of the file. The split is drawn per record with a fixed seed,
+        so every pass sees the same parts, and deduplication only keeps a set of 64-bit fingerprints.
+        """
+        draw = random.Random(42)
+        seen = set()
+        part = []
+        for chunk in iter_chunks(self.filepath, self.chunk_size):
+            for label, sentence in chunk:
+                is_test = draw.random() < self.test_size
+                if deduplicated:
+                    key = fingerprint(sentence)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                if is_test == test:
+                    part.append((label, sentence))
+            if len(part) >= self.chunk_size:
+                yield part
+                part = []
+        if part:
+            yield part
+
+    def train(self, deduplicated=False):
+        """Train the model with partial_fit over the streamed train chunks, for a number of passes."""
+        # The classes have to be known before the first partial_fit, finding them reads only the labels
+        self.classes = sorted({label for label, _ in iter_records(self.filepath)})
+        self.classifier = MODELS[self.model]()
+        for _ in range(self.epochs):
+            for chunk in self.split(deduplicated):
+                X = self.vectorizer.transform([sentence for _, sentence in chunk])
+                self.classifier.partial_fit(X, [label for label, _ in chunk], classes=self.classes)
+
+    def classify(self, sentences):
+        return self.classifier.predict(self.vectorizer.transform(sentences))
+
+    def evaluate(self, description, deduplicated=False):
+        """Evaluate the model on the streamed test chunks."""
+        y_test = []
+        y_pred = []
+        for chunk in self.split(deduplicated, test=True):
+            y_test.extend(label for label, _ in chunk)
+            y_pred.extend(self.classify([sentence for _, sentence in chunk]))
+        accuracy = accuracy_score(y_test, y_pred)
+        if self.print_output:
+            print(f"{description} Accuracy: {accuracy * 100:.2f}%")
+            print(classification_report(y_test, y_pred, zero_division=1))
+        return accuracy
+
+    def run(self):
+        """Run training and evaluation for both original and deduplicated data."""
+        # Train and evaluate on original data
+        self.train()
+        self.evaluate("Original Data")
+
+        # Train and evaluate on deduplicated data
+        self.train(deduplicated=True)
+        self.evaluate("Deduplicated Data", deduplicated=True)
+
+
+# Usage Example
+if __name__ == "__main__":
+    for model in MODELS:
+        print(f"Streaming {model}:")
+        streaming_classifier = StreamingDialogClassifier('../data/dialog_acts.dat', model=model)
+        streaming_classifier.print_output = True
+        streaming_classifier.run()
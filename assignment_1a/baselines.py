@@ -54,7 +54,8 @@ class BaselineClassifier:
 
 # Usage Example
 baseline_classifier = BaselineClassifier("../data/dialog_acts.dat", "../data/keywords.json")
-baseline_classifier.apply_baseline()
-baseline_classifier.apply_keyword_model()
-baseline_classifier.manual_test()
+if __name__ == "__main__":
+    baseline_classifier.apply_baseline()
+    baseline_classifier.apply_keyword_model()
+    baseline_classifier.manual_test()
 
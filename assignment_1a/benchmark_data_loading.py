@@ -0,0 +1,74 @@
+"""Benchmark reading dialog_acts.dat with readlines, the streaming loader and the memory mapped cache."""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from data_processing import DialogActDataset, iter_records
+
+
+def load_data_readlines(filepath):
+    """The readlines loader load_data used to be."""
+    labeled_lines = []
+    with open(filepath, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    for line in lines:
+        if len(line.strip().split(" ", 1)) == 2:
+            original_label, sentence = line.split(" ", 1)
+            labeled_lines.append((original_label.strip(), sentence.strip()))
+    return labeled_lines
+
+
+def measure(function, trace_memory=True):
+    """Seconds of one call, and the peak traced memory in MB of a second, traced call (tracing slows it down)."""
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    if not trace_memory:
+        return elapsed, None, result
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def count_records(filepath):
+    return sum(1 for _ in iter_records(filepath))
+
+
+def main(filepath='../data/dialog_acts.dat', copies='1,100', trace_memory='yes'):
+    copies = [int(n) for n in copies.split(',')]
+    trace_memory = trace_memory == 'yes'
+    work_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'records':>10} {'step':<34} {'seconds':>9} {'peak MB':>9}")
+        for n in copies:
+            corpus = os.path.join(work_dir, f"dialog_acts_{n}.dat")
+            with open(corpus, 'wb') as out, open(filepath, 'rb') as source:
+                data = source.read()
+                for _ in range(n):
+                    out.write(data)
+
+            steps = [
+                ('readlines load_data', lambda: load_data_readlines(corpus)),
+                ('streaming count (iter_records)', lambda: count_records(corpus)),
+                ('build binary cache', lambda: DialogActDataset.build(corpus)),
+                ('open cached dataset (mmap)', lambda: DialogActDataset.load(corpus)),
+                ('cached dataset -> labeled lines', lambda: DialogActDataset.load(corpus).labeled_lines()),
+            ]
+            records = None
+            for name, step in steps:
+                elapsed, peak, result = measure(step, trace_memory)
+                if isinstance(result, list):
+                    records = len(result)
+                peak = f"{peak:>9.1f}" if peak is not None else f"{'-':>9}"
+                print(f"{records or '':>10} {name:<34} {elapsed:>9.3f} {peak}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
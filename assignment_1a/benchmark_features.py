@@ -0,0 +1,44 @@
+"""Benchmark building features with preprocess_data against deriving them from the cached count matrix."""
+
+import glob
+import os
+import sys
+import time
+from data_processing import DATASETS, DialogActDataset, load_data, load_deduplicated_data, load_features, preprocess_data
+
+# The feature sets DecisionTreeDialogClassifier.run and SupportVectorMachineClassifier.run train on
+RUNS = [('count', False), ('count', True), ('tfidf', False), ('tfidf', True)]
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(filepath='../data/dialog_acts.dat', repeats=3):
+    repeats = int(repeats)
+    lines = {False: load_data(filepath), True: load_deduplicated_data(filepath)}
+    load_features(filepath)  # Import scikit-learn and scipy before timing anything
+
+    refit = min(timed(lambda: [preprocess_data(lines[deduplicated], method) for method, deduplicated in RUNS])
+                for _ in range(repeats))
+
+    # Cold: the count matrix is tokenized and saved once, warm: it is memory mapped from disk
+    for path in glob.glob(DialogActDataset.cache_path(filepath) + '.counts*'):
+        os.remove(path)
+    DATASETS.clear()
+    cold = timed(lambda: [load_features(filepath, method, deduplicated) for method, deduplicated in RUNS])
+    warm = []
+    for _ in range(repeats):
+        DATASETS.clear()
+        warm.append(timed(lambda: [load_features(filepath, method, deduplicated) for method, deduplicated in RUNS]))
+
+    print(f"Features for the {len(RUNS)} training runs of the SVM and Decision Tree:")
+    print(f"  preprocess_data, tokenizing every run:  {refit * 1000:8.1f} ms")
+    print(f"  load_features, first run (tokenizes):   {cold * 1000:8.1f} ms")
+    print(f"  load_features, from the saved counts:   {min(warm) * 1000:8.1f} ms ({refit / min(warm):.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,79 @@
+"""
+Benchmark peak memory and throughput of the batch training path against streaming training at growing corpus sizes.
+Every measurement runs in a fresh interpreter, so its peak resident memory is its own.
+
+Usage: python benchmark_streaming.py [copies of dialog_acts.dat, e.g. 1,10,40]
+"""
+
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ['batch_tree', 'batch_svc', 'streaming_svm']
+MAX_SVC_RECORDS = 30000  # SVC with a linear kernel scales quadratically, larger corpora take hours
+
+
+def train(mode, corpus):
+    """Train like the classifiers do, on every record of the corpus."""
+    if mode == 'streaming_svm':
+        from StreamingClassifier import StreamingDialogClassifier
+        StreamingDialogClassifier(corpus, model='svm', epochs=1).train()
+        return
+
+    from sklearn.svm import SVC
+    from sklearn.tree import DecisionTreeClassifier
+    from data_processing import load_data, preprocess_data
+    labeled_lines = load_data(corpus)
+    if mode == 'batch_tree':
+        X, labels, _ = preprocess_data(labeled_lines, method="count")
+        DecisionTreeClassifier(random_state=42, max_depth=20, min_samples_split=5, criterion='entropy').fit(X, labels)
+    else:
+        X, labels, _ = preprocess_data(labeled_lines, method="tfidf")
+        SVC(C=1.0, kernel='linear').fit(X, labels)
+
+
+def child(mode, corpus):
+    from data_processing import iter_records
+    start = time.perf_counter()
+    train(mode, corpus)
+    elapsed = time.perf_counter() - start
+    records = sum(1 for _ in iter_records(corpus))
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+    print(json.dumps({'records': records, 'seconds': elapsed, 'peak_mb': peak_mb}))
+
+
+def main(copies='1,10,40', filepath='../data/dialog_acts.dat'):
+    work_dir = tempfile.mkdtemp()
+    try:
+        with open(filepath, 'rb') as source:
+            data = source.read()
+        print(f"{'corpus':>10} {'mode':<15} {'train rec/s':>12} {'seconds':>9} {'peak RSS MB':>12}")
+        for n in [int(n) for n in copies.split(',')]:
+            corpus = os.path.join(work_dir, f"dialog_acts_{n}.dat")
+            with open(corpus, 'wb') as out:
+                for _ in range(n):
+                    out.write(data)
+            records = data.count(b'\n') * n
+            for mode in MODES:
+                if mode == 'batch_svc' and records > MAX_SVC_RECORDS:
+                    print(f"{records:>10,} {mode:<15} {'skipped':>12}")
+                    continue
+                output = subprocess.run([sys.executable, __file__, '--child', mode, corpus], capture_output=True,
+                                        text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{records:>10,} {mode:<15} {result['records'] / result['seconds']:>12,.0f} "
+                      f"{result['seconds']:>9.2f} {result['peak_mb']:>12.0f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--child']:
+        child(*sys.argv[2:])
+    else:
+        main(*sys.argv[1:])
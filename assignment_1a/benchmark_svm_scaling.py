@@ -0,0 +1,44 @@
+"""
+Benchmark fit and predict time of the SVM modes as the number of training sentences grows.
+Training sets larger than the corpus are drawn from its train split with replacement, predictions are always made
+for the same test split, so the accuracies stay comparable.
+
+Usage: python benchmark_svm_scaling.py [sizes, e.g. 10000,100000,1000000] [largest size for the kernel mode]
+"""
+
+import sys
+import time
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from data_processing import load_features
+from SupportVectorMachine import MODES
+
+
+def main(sizes='10000,30000,100000,300000,1000000', max_kernel_size=100000, filepath='../data/dialog_acts.dat'):
+    max_kernel_size = int(max_kernel_size)
+    X, labels, _ = load_features(filepath, method="tfidf")
+    X_train, X_test, y_train, y_test = train_test_split(X, np.array(labels), test_size=0.15, random_state=42)
+    draw = np.random.default_rng(42)
+
+    print(f"{'samples':>10} {'mode':<8} {'fit s':>9} {'predict s':>10} {'accuracy':>9}")
+    for size in [int(size) for size in sizes.split(',')]:
+        rows = draw.integers(0, X_train.shape[0], size)
+        X_sample, y_sample = X_train[rows], y_train[rows]
+        for mode in MODES:
+            if mode == 'kernel' and size > max_kernel_size:
+                print(f"{size:>10,} {mode:<8} {'skipped':>9}")
+                continue
+            classifier = MODES[mode](size)
+            start = time.perf_counter()
+            classifier.fit(X_sample, y_sample)
+            fit_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            y_pred = classifier.predict(X_test)
+            predict_seconds = time.perf_counter() - start
+            print(f"{size:>10,} {mode:<8} {fit_seconds:>9.2f} {predict_seconds:>10.3f} "
+                  f"{accuracy_score(y_test, y_pred):>9.2%}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,31 @@
+"""
+Print the duplicate ratio and label distribution of a dialog acts file, and optionally its near-duplicate pairs.
+Works from the cached label codes and sentence fingerprints, the sentences are never all held in memory.
+
+Usage: python corpus_stats.py [filepath] [near]
+"""
+
+import sys
+from data_processing import open_dataset
+
+
+def main(filepath='../data/dialog_acts.dat', near=None):
+    dataset = open_dataset(filepath)
+    stats = dataset.stats()
+    print(f"{stats['records']:,} records, {stats['unique']:,} unique sentences, "
+          f"{stats['duplicates']:,} duplicates ({stats['duplicate_ratio']:.1%})")
+
+    print(f"\n{'label':<10} {'records':>9} {'share':>7} {'unique':>8} {'share':>7}")
+    for label, count in sorted(stats['labels'].items(), key=lambda item: -item[1]):
+        unique = stats['unique_labels'][label]
+        print(f"{label:<10} {count:>9,} {count / stats['records']:>7.1%} {unique:>8,} {unique / stats['unique']:>7.1%}")
+
+    if near:
+        pairs = dataset.near_duplicates()
+        print(f"\n{len(pairs):,} near-duplicate pairs (estimated Jaccard similarity of the words >= 0.8), for example:")
+        for i, j, similarity in pairs[:5]:
+            print(f"  {similarity:.2f}  '{dataset.sentence(i)}'  ~  '{dataset.sentence(j)}'")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -1,26 +1,435 @@
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+import getpass
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from contextlib import contextmanager
+import numpy as np
+
+# Binary cache of a dialog acts file, written next to it once: a fixed header, the UTF-8 sentences packed into
+# one buffer, the label code of every record, the offset of every sentence in the buffer and the label names
+CACHE_MAGIC = b'DACT'
+CACHE_VERSION = 1
+# magic, version, records, label code width, source size, source mtime, codes offset, offsets offset,
+# label names offset, label names length
+CACHE_HEADER = struct.Struct('<4sIQIQqQQQQ')
+
+# Near-duplicate detection: MinHash permutations are (a * x + b) mod MINHASH_PRIME over 32-bit token hashes
+MINHASH_PRIME = (1 << 31) - 1
+
+# Bump this whenever the layout or the tokenization of the cached count matrix changes
+FEATURES_VERSION = 1
+
+# Datasets opened by this process, keyed by the absolute path of the source file
+DATASETS = {}
+
+
+def iter_records(filepath):
+    """Yield the (label, sentence) records of a file one line at a time."""
+    with open(filepath, 'r', encoding='utf-8') as file:
+        for line in file:
+            if len(line.strip().split(" ", 1)) == 2:
+                original_label, sentence = line.split(" ", 1)
+                yield original_label.strip(), sentence.strip()
+
+
+def iter_chunks(filepath, chunk_size=10000):
+    """Yield lists of at most chunk_size records, without reading the whole file."""
+    chunk = []
+    for record in iter_records(filepath):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def fingerprint(sentence):
+    """64-bit fingerprint of a sentence, given as str or UTF-8 bytes."""
+    if isinstance(sentence, str):
+        sentence = sentence.encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(sentence, digest_size=8).digest(), 'little')
+
+
+def padding(position, alignment=8):
+    return b'\0' * (-position % alignment)
+
+
+@contextmanager
+def atomic_write(path, mode='wb'):
+    """
+    Write to a temporary file of its own next to path and move it over path when the block succeeds, so a crash never
+    leaves a half written file behind and two processes writing at once never write into each other's file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def fallback_cache_path(filepath):
+    """Cache path in a fixed per-user folder for data folders that are read-only, the same for every run."""
+    directory = os.path.join(tempfile.gettempdir(), f"dialog_acts_cache_{getpass.getuser()}")
+    os.makedirs(directory, exist_ok=True)
+    source = hashlib.blake2b(os.path.abspath(filepath).encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(directory, f"{source}_{os.path.basename(filepath)}.bin")
+
+
+class DialogActDataset:
+    """
+    Read-only view of a dialog acts file through its memory mapped binary cache. The label codes and sentence
+    offsets are numpy arrays over the mapping and sentences are decoded on demand, so opening it copies nothing.
+    """
+
+    def __init__(self, mapping, header, path):
+        self.mapping = mapping
+        self.path = path
+        (_, _, self.size, code_width, self.source_size, self.source_mtime, codes_offset, offsets_offset,
+         labels_offset, labels_length) = header
+        self.codes = np.frombuffer(mapping, dtype=np.uint8 if code_width == 1 else np.uint16, count=self.size,
+                                   offset=codes_offset)
+        self.offsets = np.frombuffer(mapping, dtype=np.uint64, count=self.size + 1, offset=offsets_offset)
+        self.label_names = json.loads(mapping[labels_offset:labels_offset + labels_length].decode('utf-8'))
+        self.buffer_offset = CACHE_HEADER.size
+        self.records = None
+        self.dedup_index = None
+
+    @staticmethod
+    def cache_path(filepath):
+        return filepath + '.bin'
+
+    @classmethod
+    def build(cls, filepath, cache_path=None):
+        """Stream the file into its binary cache, only the offsets and label codes are kept in memory meanwhile."""
+        cache_path = cache_path or cls.cache_path(filepath)
+        stat = os.stat(filepath)
+        label_codes = {}
+        codes = array('H')
+        offsets = array('Q', [0])
+
+        with atomic_write(cache_path) as out:
+            out.write(b'\0' * CACHE_HEADER.size)
+            for chunk in iter_chunks(filepath):
+                encoded = [sentence.encode('utf-8') for _, sentence in chunk]
+                out.write(b''.join(encoded))
+                for (label, _), sentence in zip(chunk, encoded):
+                    codes.append(label_codes.setdefault(label, len(label_codes)))
+                    offsets.append(offsets[-1] + len(sentence))
+
+            position = CACHE_HEADER.size + offsets[-1]
+            out.write(padding(position))
+            codes_offset = position + len(padding(position))
+            code_width = 1 if len(label_codes) <= 256 else 2
+            code_bytes = np.asarray(codes, dtype=np.uint8 if code_width == 1 else np.uint16).tobytes()
+            out.write(code_bytes)
+
+            position = codes_offset + len(code_bytes)
+            out.write(padding(position))
+            offsets_offset = position + len(padding(position))
+            offset_bytes = np.asarray(offsets, dtype=np.uint64).tobytes()
+            out.write(offset_bytes)
+
+            labels_offset = offsets_offset + len(offset_bytes)
+            label_bytes = json.dumps(list(label_codes)).encode('utf-8')
+            out.write(label_bytes)
+
+            out.seek(0)
+            out.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(codes), code_width, stat.st_size,
+                                        stat.st_mtime_ns, codes_offset, offsets_offset, labels_offset,
+                                        len(label_bytes)))
+
+    @classmethod
+    def load(cls, filepath, cache_path=None):
+        """Map the cache of the file, returns None if there is none or the file changed since it was written."""
+        cache_path = cache_path or cls.cache_path(filepath)
+        try:
+            with open(cache_path, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Missing, unreadable or empty, the cache is then built again
+            return None
+
+        stat = os.stat(filepath)
+        header = CACHE_HEADER.unpack_from(mapping) if len(mapping) >= CACHE_HEADER.size else None
+        if (header is None or header[0] != CACHE_MAGIC or header[1] != CACHE_VERSION
+                or header[4] != stat.st_size or header[5] != stat.st_mtime_ns):
+            mapping.close()
+            return None
+        return cls(mapping, header, cache_path)
+
+    @classmethod
+    def open(cls, filepath, cache_path=None):
+        """Map the cache of the file, building it first when it is missing or stale."""
+        dataset = cls.load(filepath, cache_path)
+        if dataset is None:
+            try:
+                cls.build(filepath, cache_path)
+                dataset = cls.load(filepath, cache_path)
+            except OSError:
+                pass
+        if dataset is None:
+            # The cache next to the file cannot be written or read, use the one in the per-user cache folder
+            cache_path = fallback_cache_path(filepath)
+            dataset = cls.load(filepath, cache_path)
+            if dataset is None:
+                cls.build(filepath, cache_path)
+                dataset = cls.load(filepath, cache_path)
+        return dataset
+
+    def __len__(self):
+        return self.size
+
+    def sentence(self, i):
+        start = self.buffer_offset + int(self.offsets[i])
+        end = self.buffer_offset + int(self.offsets[i + 1])
+        return self.mapping[start:end].decode('utf-8')
+
+    def __getitem__(self, i):
+        return self.label_names[self.codes[i]], self.sentence(i)
+
+    def sentences(self):
+        """All sentences as a list of str, decoded in one go."""
+        data = self.mapping[self.buffer_offset:self.buffer_offset + int(self.offsets[-1])]
+        offsets = self.offsets.tolist()
+        if data.isascii():
+            # Byte offsets are character offsets, so the sentences are slices of one decoded string
+            text = data.decode('ascii')
+            return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    def labels(self):
+        return [self.label_names[code] for code in self.codes.tolist()]
+
+    def labeled_lines(self):
+        """The (label, sentence) records as load_data returns them, decoded once and shared by every caller."""
+        if self.records is None:
+            self.records = list(zip(self.labels(), self.sentences()))
+        return list(self.records)
+
+    def __iter__(self):
+        return iter(self.labeled_lines())
+
+    def iter_chunks(self, chunk_size=10000):
+        """Yield lists of at most chunk_size records, decoding only the chunk."""
+        for start in range(0, self.size, chunk_size):
+            yield [self[i] for i in range(start, min(start + chunk_size, self.size))]
+
+    def fingerprints(self, chunk_size=100000):
+        """64-bit fingerprint of every sentence, hashed from the mapped bytes one chunk at a time."""
+        result = np.empty(self.size, dtype=np.uint64)
+        for start in range(0, self.size, chunk_size):
+            end = min(start + chunk_size, self.size)
+            offsets = (self.offsets[start:end + 1] + self.buffer_offset).tolist()
+            digests = b''.join(hashlib.blake2b(self.mapping[begin:stop], digest_size=8).digest()
+                               for begin, stop in zip(offsets, offsets[1:]))
+            result[start:end] = np.frombuffer(digests, dtype='<u8')
+        return result
+
+    def deduplicated_index(self):
+        """
+        Positions of the first record of every distinct sentence, in file order. Computed from the fingerprints,
+        not the sentences, once per version of the file and saved next to the cache.
+        """
+        if self.dedup_index is not None:
+            return self.dedup_index
+
+        path = self.path + '.dedup.npz'
+        source = np.array([self.source_size, self.source_mtime], dtype=np.int64)
+        try:
+            with np.load(path) as saved:
+                if np.array_equal(saved['source'], source):
+                    self.dedup_index = saved['index']
+                    return self.dedup_index
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            pass
+
+        _, first = np.unique(self.fingerprints(), return_index=True)
+        self.dedup_index = np.sort(first).astype(np.uint32 if self.size < 2 ** 32 else np.uint64)
+        try:
+            with atomic_write(path) as f:
+                np.savez(f, index=self.dedup_index, source=source)
+        except OSError:
+            pass
+        return self.dedup_index
+
+    def deduplicated_lines(self):
+        """The (label, sentence) records as remove_duplicates returns them."""
+        if self.records is not None:
+            return [self.records[i] for i in self.deduplicated_index().tolist()]
+        return [self[i] for i in self.deduplicated_index().tolist()]
+
+    def count_matrix(self):
+        """
+        Sparse matrix of word counts of every record and its vocabulary, tokenized once per version of the file and
+        saved next to the cache as CSR arrays (data, indices, indptr) that are memory mapped when loaded again.
+        """
+        from scipy.sparse import csr_matrix
+
+        prefix = self.path + '.counts'
+        settings = {'version': FEATURES_VERSION, 'source': [self.source_size, self.source_mtime], 'lowercase': True}
+        try:
+            with open(prefix + '.json', 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved['settings'] == settings:
+                arrays = [np.load(f"{prefix}.{name}.npy", mmap_mode='r') for name in ('data', 'indices', 'indptr')]
+                return csr_matrix(tuple(arrays), shape=(self.size, len(saved['vocabulary']))), saved['vocabulary']
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            pass
+
+        from sklearn.feature_extraction.text import CountVectorizer
+        vectorizer = CountVectorizer(lowercase=True)
+        counts = vectorizer.fit_transform(self.sentences()).tocsr()
+        vocabulary = vectorizer.get_feature_names_out().tolist()
+        try:
+            for name in ('data', 'indices', 'indptr'):
+                with atomic_write(f"{prefix}.{name}.npy") as f:
+                    np.save(f, getattr(counts, name))
+            # The vocabulary is written last, so it marks a complete set of arrays
+            with atomic_write(prefix + '.json', 'w') as f:
+                json.dump({'settings': settings, 'vocabulary': vocabulary}, f)
+        except OSError:
+            pass
+        return counts, vocabulary
+
+    def stats(self):
+        """Record counts, duplicate ratio and label distribution before and after deduplication, from the codes only."""
+        index = self.deduplicated_index()
+        counts = np.bincount(self.codes, minlength=len(self.label_names))
+        unique_counts = np.bincount(self.codes[index], minlength=len(self.label_names))
+        return {
+            'records': self.size,
+            'unique': len(index),
+            'duplicates': self.size - len(index),
+            'duplicate_ratio': (self.size - len(index)) / self.size if self.size else 0.0,
+            'labels': dict(zip(self.label_names, counts.tolist())),
+            'unique_labels': dict(zip(self.label_names, unique_counts.tolist())),
+        }
+
+    def near_duplicates(self, threshold=0.8, num_perm=64, bands=16, seed=1):
+        """
+        Pairs (i, j, estimated Jaccard similarity) of deduplicated records whose word sets are at least threshold
+        similar, found with MinHash signatures and locality sensitive hashing over bands of the signature.
+        """
+        index = self.deduplicated_index().tolist()
+        rows = num_perm // bands
+        random_state = np.random.RandomState(seed)
+        a = random_state.randint(1, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+        b = random_state.randint(0, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+
+        # Hash the distinct words of every record, then take the minimum of every permutation per record at once
+        token_ids = {}
+        row_tokens = []
+        starts = []
+        for i in index:
+            starts.append(len(row_tokens))
+            row_tokens.extend(token_ids.setdefault(token, len(token_ids)) for token in set(self.sentence(i).split()))
+        token_hashes = np.array([fingerprint(token) & 0xFFFFFFFF for token in token_ids], dtype=np.uint64)
+        permuted = (np.outer(token_hashes[np.array(row_tokens, dtype=np.int64)], a) + b) % MINHASH_PRIME
+        signatures = np.full((len(index), num_perm), MINHASH_PRIME, dtype=np.uint64)
+        starts = np.array(starts, dtype=np.int64)
+        non_empty = np.diff(np.append(starts, len(row_tokens))) > 0
+        if len(row_tokens):
+            signatures[non_empty] = np.minimum.reduceat(permuted, starts[non_empty], axis=0)
+
+        candidates = set()
+        for band in range(bands):
+            buckets = {}
+            for row, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+                buckets.setdefault(key, []).append(row)
+            for rows_in_bucket in buckets.values():
+                for x in range(len(rows_in_bucket)):
+                    for y in range(x + 1, len(rows_in_bucket)):
+                        candidates.add((rows_in_bucket[x], rows_in_bucket[y]))
+
+        if not candidates:
+            return []
+        # Fraction of equal signature positions estimates the Jaccard similarity of every candidate pair at once
+        xs, ys = np.array(sorted(candidates), dtype=np.int64).T
+        similarities = (signatures[xs] == signatures[ys]).mean(axis=1)
+        keep = similarities >= threshold
+        pairs = [(index[x], index[y], similarity)
+                 for x, y, similarity in zip(xs[keep].tolist(), ys[keep].tolist(), similarities[keep].tolist())]
+        return pairs
+
+
+def open_dataset(filepath):
+    """The dataset of a file, opened once per process and shared by every model that loads it."""
+    key = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    dataset = DATASETS.get(key)
+    if dataset is None or (dataset.source_size, dataset.source_mtime) != (stat.st_size, stat.st_mtime_ns):
+        dataset = DATASETS[key] = DialogActDataset.open(filepath)
+    return dataset
 
 
 def load_data(filepath):
     """Load data from a file."""
-    labeled_lines = []
-    with open(filepath, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
-    for line in lines:
-        if len(line.strip().split(" ", 1)) == 2:
-            original_label, sentence = line.split(" ", 1)
-            labeled_lines.append((original_label.strip(), sentence.strip()))
-    return labeled_lines
+    return open_dataset(filepath).labeled_lines()
+
+
+def load_deduplicated_data(filepath):
+    """Load the data without duplicate sentences, deduplicated once per version of the file."""
+    return open_dataset(filepath).deduplicated_lines()
+
+
+def load_features(filepath, method="tfidf", deduplicated=False):
+    """
+    Features, labels and fitted vectorizer of the file like preprocess_data returns them for load_data or
+    load_deduplicated_data, derived from the cached count matrix instead of tokenizing the sentences again.
+    """
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+
+    dataset = open_dataset(filepath)
+    counts, vocabulary = dataset.count_matrix()
+    codes = dataset.codes
+    if deduplicated:
+        # The deduplicated records contain every distinct sentence, so they have the same vocabulary
+        index = dataset.deduplicated_index()
+        counts = counts[index]
+        codes = codes[index]
+    labels = [dataset.label_names[code] for code in codes.tolist()]
+    vocabulary = {term: column for column, term in enumerate(vocabulary)}
+
+    if method == "tfidf":
+        # The inverse document frequencies are fitted on the selected records only, as fit_transform would. The float
+        # counts keep the column order of the tokenizer within every row, so the row norms come out bit for bit equal
+        transformer = TfidfTransformer()
+        X = transformer.fit_transform(csr_matrix((counts.data.astype(np.float64), counts.indices, counts.indptr),
+                                                 shape=counts.shape))
+        vectorizer = TfidfVectorizer(vocabulary=vocabulary)
+        vectorizer.idf_ = transformer.idf_
+    else:
+        X = counts.astype(np.int64)
+        # Fitting with a fixed vocabulary only sets vocabulary_, so the vectorizer is fitted like preprocess_data's
+        vectorizer = CountVectorizer(lowercase=True, vocabulary=vocabulary).fit([])
+    return X, labels, vectorizer
 
 
 def remove_duplicates(labeled_lines):
-    """Remove duplicate sentences from the data."""
-    seen_sentences = set()
-    return [(label, sentence) for label, sentence in labeled_lines if sentence not in seen_sentences and not seen_sentences.add(sentence)]
+    """Remove duplicate sentences from the data, keeping the first record of every sentence."""
+    seen_fingerprints = set()
+    deduplicated = []
+    for label, sentence in labeled_lines:
+        key = fingerprint(sentence)
+        if key not in seen_fingerprints:
+            seen_fingerprints.add(key)
+            deduplicated.append((label, sentence))
+    return deduplicated
 
 
 def preprocess_data(labeled_lines, method="tfidf"):
     """Convert sentences to features using either TF-IDF or CountVectorizer."""
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
     sentences = [sentence for _, sentence in labeled_lines]
     if method == "tfidf":
         vectorizer = TfidfVectorizer()
@@ -0,0 +1,17 @@
+"""Lets the tests import the assignment_1a modules the way its scripts do, run from the assignment_1a folder."""
+
+import os
+import sys
+import pytest
+
+ASSIGNMENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (os.path.dirname(ASSIGNMENT_DIR), ASSIGNMENT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(autouse=True)
+def assignment_dir(monkeypatch):
+    # The modules find the data and models through paths relative to the assignment folder
+    monkeypatch.chdir(ASSIGNMENT_DIR)
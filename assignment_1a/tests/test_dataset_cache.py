@@ -0,0 +1,64 @@
+import os
+import tempfile
+import threading
+import pytest
+from data_processing import DialogActDataset, fallback_cache_path, iter_records
+
+LINES = ['inform im looking for a cheap restaurant', 'affirm yes', 'inform in the north', 'affirm yes',
+         'bye thank you good bye', 'inform café with crème brûlée']
+
+
+@pytest.fixture
+def dialog_acts(tmp_path):
+    path = tmp_path / 'dialog_acts.dat'
+    path.write_text('\n'.join(LINES * 50) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_cache_holds_the_records_of_the_file(dialog_acts):
+    dataset = DialogActDataset.open(dialog_acts)
+    assert dataset.labeled_lines() == list(iter_records(dialog_acts))
+    assert [dataset[i] for i in range(len(dataset))] == list(iter_records(dialog_acts))
+
+
+def test_concurrent_builds_leave_a_valid_cache(dialog_acts):
+    errors = []
+
+    def build():
+        try:
+            for _ in range(5):
+                DialogActDataset.build(dialog_acts)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert DialogActDataset.load(dialog_acts).labeled_lines() == list(iter_records(dialog_acts))
+    assert not [name for name in os.listdir(os.path.dirname(dialog_acts)) if name.endswith('.tmp')]
+
+
+def test_unusable_cache_falls_back_to_one_per_user_folder(dialog_acts, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path / 'tmp'))
+    os.makedirs(tmp_path / 'tmp')
+    # A directory where the cache should be, so it can neither be read nor replaced
+    os.makedirs(DialogActDataset.cache_path(dialog_acts))
+
+    first = DialogActDataset.open(dialog_acts)
+    second = DialogActDataset.open(dialog_acts)
+    assert first.path == second.path == fallback_cache_path(dialog_acts)
+    assert second.labeled_lines() == list(iter_records(dialog_acts))
+    assert len(os.listdir(os.path.dirname(first.path))) == 1
+
+
+def test_dedup_and_count_caches_are_written_next_to_the_cache(dialog_acts):
+    dataset = DialogActDataset.open(dialog_acts)
+    dataset.deduplicated_index()
+    dataset.count_matrix()
+    names = os.listdir(os.path.dirname(dialog_acts))
+    assert 'dialog_acts.dat.bin.dedup.npz' in names
+    assert 'dialog_acts.dat.bin.counts.json' in names
+    assert not [name for name in names if name.endswith('.tmp')]
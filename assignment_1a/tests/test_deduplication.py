@@ -0,0 +1,41 @@
+import shutil
+import pandas as pd
+import pytest
+from data_processing import DATASETS, load_data, load_deduplicated_data, open_dataset, remove_duplicates
+
+
+@pytest.fixture
+def dialog_acts(tmp_path):
+    path = tmp_path / 'dialog_acts.dat'
+    shutil.copy('../data/dialog_acts.dat', path)
+    return str(path)
+
+
+def first_of_every_sentence(labeled_lines):
+    first = {}
+    for label, sentence in labeled_lines:
+        first.setdefault(sentence, (label, sentence))
+    return list(first.values())
+
+
+def test_matches_drop_duplicates(dialog_acts):
+    labeled_lines = load_data(dialog_acts)
+    expected = pd.DataFrame(labeled_lines, columns=['label', 'sentence']).drop_duplicates('sentence')
+    deduplicated = load_deduplicated_data(dialog_acts)
+    assert deduplicated == list(expected.itertuples(index=False, name=None))
+    assert deduplicated == first_of_every_sentence(labeled_lines)
+    assert remove_duplicates(labeled_lines) == deduplicated
+
+
+def test_saved_index_is_reused(dialog_acts):
+    index = open_dataset(dialog_acts).deduplicated_index()
+    DATASETS.clear()
+    assert (open_dataset(dialog_acts).deduplicated_index() == index).all()
+
+
+def test_small_file_with_repeats(tmp_path):
+    path = tmp_path / 'repeats.dat'
+    lines = ['inform cheap food', 'affirm yes', 'inform cheap food', 'null café', 'ack yes', 'null café', 'bye bye']
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    assert load_deduplicated_data(str(path)) == [
+        ('inform', 'cheap food'), ('affirm', 'yes'), ('null', 'café'), ('bye', 'bye')]
@@ -0,0 +1,32 @@
+import shutil
+import numpy as np
+import pytest
+from data_processing import DATASETS, load_data, load_deduplicated_data, load_features, preprocess_data
+
+
+@pytest.fixture
+def dialog_acts(tmp_path):
+    path = tmp_path / 'dialog_acts.dat'
+    shutil.copy('../data/dialog_acts.dat', path)
+    return str(path)
+
+
+@pytest.mark.parametrize('method', ['count', 'tfidf'])
+@pytest.mark.parametrize('deduplicated', [False, True])
+def test_same_features_as_preprocess_data(dialog_acts, method, deduplicated):
+    lines = load_deduplicated_data(dialog_acts) if deduplicated else load_data(dialog_acts)
+    expected_X, expected_labels, expected_vectorizer = preprocess_data(lines, method)
+
+    # Once tokenizing the sentences, once from the saved count matrix
+    for _ in range(2):
+        DATASETS.clear()
+        X, labels, vectorizer = load_features(dialog_acts, method, deduplicated)
+        assert labels == expected_labels
+        assert vectorizer.vocabulary_ == expected_vectorizer.vocabulary_
+        assert X.shape == expected_X.shape and X.dtype == expected_X.dtype
+        assert (X != expected_X).nnz == 0
+
+        # The returned vectorizer transforms new sentences the same way
+        sentences = ['i want cheap chinese food', 'thank you good bye', 'unknownword']
+        assert np.array_equal(vectorizer.transform(sentences).toarray(),
+                              expected_vectorizer.transform(sentences).toarray())
@@ -1,5 +1,7 @@
 """This file contains utility functions for the dialogue act classification task."""
 
+from data_processing import open_dataset
+
 
 def manual_test_model(classify_function, keywords):
     while True:
@@ -14,15 +16,6 @@ def manual_test_model(classify_function, keywords):
 
 
 def retrieve_data(filepath):
-    with open(filepath, 'r') as file:
-        data = {'label': [], 'sentence': [], 'prediction': []}
-
-        for line in file:
-            words = line.split(maxsplit=1)
-            if len(words) > 1:
-                data['label'].append(words[0])
-                data['sentence'].append(words[1])
-            else:
-                data['label'].append(words[0])
-                data['sentence'].append('')
-    return data
+    """Returns the labels and sentences of the file as lists, from the dataset shared with the other models."""
+    dataset = open_dataset(filepath)
+    return {'label': dataset.labels(), 'sentence': dataset.sentences(), 'prediction': []}
@@ -2,6 +2,7 @@
 
 from collections import Counter
 from collections import defaultdict
+from assignment_1b.levenshtein import closest_word, levenshtein_distance
 
 
 class TextProcessor:
@@ -25,27 +26,11 @@ class TextProcessor:
         self.word_counter = Counter()
 
     def levenshtein_recursive(self, str1, str2, m, n):
-        if m == 0:
-            return n
-        if n == 0:
-            return m
-        if str1[m - 1] == str2[n - 1]:
-            return self.levenshtein_recursive(str1, str2, m - 1, n - 1)
-        return 1 + min(
-            self.levenshtein_recursive(str1, str2, m, n - 1),  # Insert
-            self.levenshtein_recursive(str1, str2, m - 1, n),  # Remove
-            self.levenshtein_recursive(str1, str2, m - 1, n - 1)  # Replace
-        )
+        """Levenshtein distance between the first m characters of str1 and the first n characters of str2"""
+        return levenshtein_distance(str1[:m], str2[:n])
 
     def apply_levenshtein(self, word, category_words, threshold=1):
-        closest_word = None
-        min_distance = float('inf')
-        for new_word in category_words:
-            distance = self.levenshtein_recursive(word, new_word, len(word), len(new_word))
-            if distance < min_distance and distance <= threshold:
-                closest_word = new_word
-                min_distance = distance
-        return closest_word
+        return closest_word(word, category_words, threshold)
 
     def categorize_words(self, sentence):
         sentence_words = sentence.lower().split()
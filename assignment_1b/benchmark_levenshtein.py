@@ -0,0 +1,68 @@
+"""Micro-benchmark of the thresholded Levenshtein distance against the full and the recursive versions."""
+
+import random
+import string
+import timeit
+from assignment_1b.levenshtein import DeletionIndex, bounded_levenshtein, closest_word, levenshtein_distance
+
+
+def levenshtein_recursive(str1, str2, m, n):
+    """The original recursive implementation without memoization, kept here as a reference."""
+    if m == 0:
+        return n
+    if n == 0:
+        return m
+    if str1[m - 1] == str2[n - 1]:
+        return levenshtein_recursive(str1, str2, m - 1, n - 1)
+    return 1 + min(
+        levenshtein_recursive(str1, str2, m, n - 1),  # Insert
+        levenshtein_recursive(str1, str2, m - 1, n),  # Remove
+        levenshtein_recursive(str1, str2, m - 1, n - 1)  # Replace
+    )
+
+
+def misspell(word):
+    """Replace one character, so the pair is within the threshold of 1."""
+    i = random.randrange(len(word))
+    return word[:i] + random.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def main(max_recursive_length=7, number=20):
+    random.seed(42)
+    print(f"{'length':>6} {'bounded close':>14} {'bounded far':>12} {'full':>10} {'recursive':>10}  (us per call)")
+    for length in range(3, 31):
+        word = ''.join(random.choices(string.ascii_lowercase, k=length))
+        close = misspell(word)
+        far = ''.join(random.choices(string.ascii_lowercase, k=length))
+
+        bounded_close = timeit.timeit(lambda: bounded_levenshtein(word, close, 1), number=number) / number
+        bounded_far = timeit.timeit(lambda: bounded_levenshtein(word, far, 1), number=number) / number
+        full = timeit.timeit(lambda: levenshtein_distance(word, far), number=number) / number
+
+        # The recursive version is exponential, so only time it on short words
+        if length <= max_recursive_length:
+            recursive = timeit.timeit(lambda: levenshtein_recursive(word, far, length, length), number=1)
+            recursive = f"{recursive * 1e6:>10.1f}"
+        else:
+            recursive = f"{'-':>10}"
+
+        print(f"{length:>6} {bounded_close * 1e6:>14.1f} {bounded_far * 1e6:>12.1f} {full * 1e6:>10.1f} {recursive}")
+
+
+def benchmark_vocabulary(sizes=(36, 1000, 10000, 100000), queries=200):
+    """Compare a linear scan with the deletion index for fuzzy lookups in growing vocabularies."""
+    random.seed(42)
+    print(f"\n{'vocabulary':>10} {'linear scan':>12} {'index':>10}  (us per lookup)")
+    for size in sizes:
+        words = [''.join(random.choices(string.ascii_lowercase, k=random.randint(4, 12))) for _ in range(size)]
+        index = DeletionIndex(words)
+        lookups = [misspell(random.choice(words)) for _ in range(queries)]
+
+        linear = timeit.timeit(lambda: [closest_word(word, words) for word in lookups], number=1) / queries
+        indexed = timeit.timeit(lambda: [index.lookup(word) for word in lookups], number=1) / queries
+        print(f"{size:>10} {linear * 1e6:>12.1f} {indexed * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
+    benchmark_vocabulary()
@@ -0,0 +1,150 @@
+"""Thresholded Levenshtein edit distance, shared by the TextProcessors of assignments 1b, 1c and 2."""
+
+import itertools
+
+
+def bounded_levenshtein(str1, str2, threshold):
+    """
+    Calculate the Levenshtein distance between two strings, but stop as soon as it is known to exceed threshold.
+    Returns the exact distance when it is at most threshold, otherwise threshold + 1.
+    """
+    len1, len2 = len(str1), len(str2)
+    limit = threshold + 1
+
+    # The distance is at least the difference in length
+    if abs(len1 - len2) > threshold:
+        return limit
+    if str1 == str2:
+        return 0
+    if len1 > len2:
+        str1, str2, len1, len2 = str2, str1, len2, len1
+
+    previous = [j if j <= threshold else limit for j in range(len2 + 1)]
+    for i in range(1, len1 + 1):
+        current = [limit] * (len2 + 1)
+        current[0] = i if i <= threshold else limit
+        row_min = current[0]
+        char1 = str1[i - 1]
+
+        # Only cells within threshold of the diagonal can still end up under the threshold
+        for j in range(max(1, i - threshold), min(len2, i + threshold) + 1):
+            if char1 == str2[j - 1]:
+                distance = previous[j - 1]
+            else:
+                distance = 1 + min(previous[j],  # Deletion
+                                   current[j - 1],  # Insertion
+                                   previous[j - 1])  # Substitution
+            if distance > limit:
+                distance = limit
+            current[j] = distance
+            if distance < row_min:
+                row_min = distance
+
+        # Every path to the last cell passes through this row, so stop early once it is over the threshold
+        if row_min > threshold:
+            return limit
+        previous = current
+
+    return previous[len2]
+
+
+def levenshtein_distance(str1, str2):
+    """Calculate the exact Levenshtein distance between two strings."""
+    return bounded_levenshtein(str1, str2, max(len(str1), len(str2)))
+
+
+def closest_word(word, category_words, threshold=1):
+    """Find the first closest word within threshold, or None when no word is close enough."""
+    closest = None
+    min_distance = threshold + 1
+
+    for new_word in category_words:
+        distance = bounded_levenshtein(word, new_word, min_distance - 1)
+        if distance < min_distance:
+            closest = new_word
+            min_distance = distance
+            if distance == 0:
+                break
+
+    return closest
+
+
+def deletions(word, max_distance):
+    """All strings that can be made from word by deleting at most max_distance characters."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class DeletionIndex:
+    """
+    Vocabulary with a SymSpell style deletion index for lookups within a small edit distance.
+    Two words are within distance k only if they share a string made by deleting at most k characters from each,
+    so a lookup only verifies the words sharing a deletion instead of scanning the whole vocabulary.
+    Behaves like a set of words, adding a word updates the index incrementally.
+    Every change gets a new version number, unique over all indexes, so results can be cached per version.
+    """
+
+    versions = itertools.count()
+
+    def __init__(self, words=(), max_distance=1):
+        self.max_distance = max_distance
+        self.words = {}  # word -> insertion order, used to break ties like a linear scan would
+        self.index = {}  # deletion -> words it can be made from
+        self.added = 0
+        self.version = next(self.versions)
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if word in self.words:
+            return
+        self.words[word] = self.added
+        self.added += 1
+        self.version = next(self.versions)
+        for variant in deletions(word, self.max_distance):
+            self.index.setdefault(variant, []).append(word)
+
+    def discard(self, word):
+        if word not in self.words:
+            return
+        del self.words[word]
+        self.version = next(self.versions)
+        for variant in deletions(word, self.max_distance):
+            words = self.index[variant]
+            words.remove(word)
+            if not words:
+                del self.index[variant]
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+    def lookup(self, word, threshold=1):
+        """Find the closest word within threshold, ties go to the word that was added first."""
+        if threshold > self.max_distance:
+            return closest_word(word, self.words, threshold)
+        if word in self.words:
+            return word
+
+        candidates = set()
+        for variant in deletions(word, threshold):
+            candidates.update(self.index.get(variant, ()))
+
+        closest = None
+        best = (threshold + 1, 0)
+        for candidate in candidates:
+            distance = bounded_levenshtein(word, candidate, threshold)
+            if (distance, self.words[candidate]) < best:
+                closest = candidate
+                best = (distance, self.words[candidate])
+
+        return closest
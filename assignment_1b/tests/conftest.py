@@ -0,0 +1,10 @@
+"""Lets the tests import the assignment_1b modules as a package, the way assignment_2 shares its Levenshtein code."""
+
+import os
+import sys
+
+# Only the repository root, the assignment_1b module names clash with the assignment_2 ones
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,34 @@
+import itertools
+import random
+import string
+import pytest
+from assignment_1b.benchmark_levenshtein import levenshtein_recursive
+from assignment_1b.levenshtein import bounded_levenshtein, levenshtein_distance
+
+
+def random_pairs(count=300, max_length=6, alphabet='abc'):
+    random.seed(42)
+    for _ in range(count):
+        yield (''.join(random.choices(alphabet, k=random.randint(0, max_length))),
+               ''.join(random.choices(alphabet, k=random.randint(0, max_length))))
+
+
+def test_exact_distance_matches_the_recursive_version():
+    for str1, str2 in random_pairs():
+        assert levenshtein_distance(str1, str2) == levenshtein_recursive(str1, str2, len(str1), len(str2))
+
+
+@pytest.mark.parametrize('threshold', [0, 1, 2, 3])
+def test_bounded_distance_is_exact_up_to_the_threshold(threshold):
+    for str1, str2 in random_pairs():
+        expected = levenshtein_recursive(str1, str2, len(str1), len(str2))
+        assert bounded_levenshtein(str1, str2, threshold) == min(expected, threshold + 1)
+
+
+def test_vocabulary_misspellings():
+    # Short words only, the recursive version is exponential in their length
+    words = ['british', 'thai', 'centre', 'north', 'cheap']
+    misspellings = ['britsh', 'tai', 'center', 'nort', 'cheep', string.ascii_lowercase[:5]]
+    for word, other in itertools.product(words, misspellings):
+        expected = levenshtein_recursive(word, other, len(word), len(other))
+        assert bounded_levenshtein(word, other, 1) == min(expected, 2)
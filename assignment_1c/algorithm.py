@@ -2,6 +2,7 @@
 
 from collections import Counter
 from collections import defaultdict
+from assignment_1b.levenshtein import closest_word, levenshtein_distance
 
 
 class TextProcessor:
@@ -30,40 +31,13 @@ class TextProcessor:
         """
         Apply the Levenshtein distance algorithm to find the closest word in a list of words
         """
-        closest_word = None
-        min_distance = float('inf')
-
-        for new_word in category_words:
-            distance = self.levenshtein_distance(word, new_word)
-            if distance < min_distance and distance <= threshold:
-                closest_word = new_word
-                min_distance = distance
-
-        return closest_word
+        return closest_word(word, category_words, threshold)
 
     def levenshtein_distance(self, str1, str2):
         """
         Calculate the Levenshtein distance between two strings
         """
-        memo = [[0] * (len(str2) + 1) for _ in range(len(str1) + 1)]
-
-        # Initialize base cases (when one string is empty)
-        for i in range(len(str1) + 1):
-            memo[i][0] = i
-        for j in range(len(str2) + 1):
-            memo[0][j] = j
-
-        # Fill the memo table
-        for i in range(1, len(str1) + 1):
-            for j in range(1, len(str2) + 1):
-                if str1[i - 1] == str2[j - 1]:
-                    memo[i][j] = memo[i - 1][j - 1]
-                else:
-                    memo[i][j] = 1 + min(memo[i - 1][j],  # Deletion
-                                         memo[i][j - 1],  # Insertion
-                                         memo[i - 1][j - 1])  # Substitution
-
-        return memo[len(str1)][len(str2)]
+        return levenshtein_distance(str1, str2)
 
     def categorize_words(self, sentence):
         """
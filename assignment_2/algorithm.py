@@ -1,11 +1,140 @@
 # algorithm.py
 
-from collections import Counter
+import time
+from collections import Counter, OrderedDict
 from collections import defaultdict
+from assignment_1b.levenshtein import DeletionIndex, closest_word, levenshtein_distance
+
+
+class DynamicVocabulary(DeletionIndex):
+    """
+    Deletion index with a capacity, evicting the least frequently used word (or least recently used with
+    policy='lru') when a new word would go over the capacity. Keeps counters of hits, misses and evictions.
+    """
+
+    def __init__(self, capacity=500, policy='lfu'):
+        super().__init__()
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        if policy not in ('lfu', 'lru'):
+            raise ValueError(f"policy must be 'lfu' or 'lru', got {policy!r}")
+        self.capacity = capacity
+        self.policy = policy
+        # Use count of every word, and the words of every count from least to most recently used,
+        # so both the LFU and the LRU victim are found in constant time
+        self.frequency = {}
+        self.buckets = defaultdict(OrderedDict)
+        self.min_frequency = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def touch(self, word):
+        count = self.frequency.get(word, 0)
+        # With policy='lru' every word stays in one bucket, which then is in order of last use
+        new_count = count + 1 if self.policy == 'lfu' else 1
+        if count:
+            bucket = self.buckets[count]
+            del bucket[word]
+            if not bucket:
+                del self.buckets[count]
+                if self.min_frequency == count:
+                    self.min_frequency = new_count
+        else:
+            self.min_frequency = new_count
+        self.frequency[word] = new_count
+        self.buckets[new_count][word] = None
+
+    def add(self, word):
+        if word in self.words:
+            self.touch(word)
+            return
+        if len(self.words) >= self.capacity:
+            self.evict()
+        super().add(word)
+        self.touch(word)
+
+    def evict(self):
+        bucket = self.buckets[self.min_frequency]
+        victim, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self.buckets[self.min_frequency]
+        del self.frequency[victim]
+        self.discard(victim)
+        self.evictions += 1
+
+    def __contains__(self, word):
+        if word in self.words:
+            self.hits += 1
+            self.touch(word)
+            return True
+        self.misses += 1
+        return False
+
+    def lookup(self, word, threshold=1):
+        closest = super().lookup(word, threshold)
+        self.record_lookup(closest)
+        return closest
+
+    def record_lookup(self, closest):
+        """Counts a lookup and touches the word it found, also when the lookup was answered by a FuzzyMatchCache."""
+        if closest is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.touch(closest)
+
+    def stats(self):
+        return {
+            'size': len(self.words),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class FuzzyMatchCache:
+    """
+    Size bounded LRU memo of fuzzy matches keyed by (token, category, vocabulary versions).
+    A change to a vocabulary gives it a new version, so older entries are never hit again and age out.
+    One cache can be shared by several TextProcessors.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns (True, match) when the key is cached, (False, None) otherwise."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, match):
+        self.entries[key] = match
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
 
 
 class TextProcessor:
-    def __init__(self):
+    def __init__(self, dynamic_limits=None, eviction_policy='lfu', fuzzy_cache=None):
         self.basic_dict = {
             'food_type': ['british', 'modern european', 'italian', 'romanian', 'seafood', 'chinese',
                           'steakhouse', 'asian oriental', 'french', 'portuguese', 'indian', 'spanish',
@@ -16,119 +145,173 @@ class TextProcessor:
             'price_range': ['moderate', 'expensive', 'cheap'],
             'location': ['north', 'south', 'east', 'west', 'centre', 'any']
         }
+        # Index every vocabulary for fuzzy lookups, the dynamic ones grow with the words users mention
+        self.basic_dict = {category: DeletionIndex(words) for category, words in self.basic_dict.items()}
 
+        # Words learned from users, bounded per category so memory and lookup cost stay flat in long running processes
+        self.dynamic_limits = {'food_type': 500, 'price_range': 100, 'location': 100}
+        self.dynamic_limits.update(dynamic_limits or {})
         self.dynamic_dict = {
-            'food_type': set(),
-            'price_range': set(),
-            'location': set()
+            category: DynamicVocabulary(limit, eviction_policy) for category, limit in self.dynamic_limits.items()
         }
 
         self.stopwords = set(['a', 'an', 'the', 'in', 'that', 'priced', 'would'])
-        self.word_counter = Counter()
+        self.fuzzy_cache = fuzzy_cache if fuzzy_cache is not None else FuzzyMatchCache()
+        self.compile_phrases()
+
+        # Per utterance parse latency
+        self.parse_latency = 0.0
+        self.parse_count = 0
+        self.parse_total_time = 0.0
+        self.parse_max_latency = 0.0
 
     def apply_levenshtein(self, word, category_words, threshold=1):
         """
         Apply the Levenshtein distance algorithm to find the closest word in a list of words
         """
-        closest_word = None
-        min_distance = float('inf')
-
-        for new_word in category_words:
-            distance = self.levenshtein_distance(word, new_word)
-            if distance < min_distance and distance <= threshold:
-                closest_word = new_word
-                min_distance = distance
-
-        return closest_word
+        if isinstance(category_words, DeletionIndex):
+            return category_words.lookup(word, threshold)
+        return closest_word(word, category_words, threshold)
 
     def levenshtein_distance(self, str1, str2):
         """
         Calculate the Levenshtein distance between two strings
         """
-        memo = [[0] * (len(str2) + 1) for _ in range(len(str1) + 1)]
+        return levenshtein_distance(str1, str2)
+
+    def compile_phrases(self):
+        """
+        Compile the multi-word vocabulary values (e.g. 'modern european') into a lookup keyed by their first word
+        """
+        self.phrases = defaultdict(list)
+        for category, words in self.basic_dict.items():
+            for phrase in words:
+                tokens = tuple(phrase.split())
+                if len(tokens) > 1:
+                    self.phrases[tokens[0]].append((tokens, phrase, category))
 
-        # Initialize base cases (when one string is empty)
-        for i in range(len(str1) + 1):
-            memo[i][0] = i
-        for j in range(len(str2) + 1):
-            memo[0][j] = j
+        # Try the longest phrases first, so 'north american' wins over 'north'
+        for candidates in self.phrases.values():
+            candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
 
-        # Fill the memo table
-        for i in range(1, len(str1) + 1):
-            for j in range(1, len(str2) + 1):
-                if str1[i - 1] == str2[j - 1]:
-                    memo[i][j] = memo[i - 1][j - 1]
-                else:
-                    memo[i][j] = 1 + min(memo[i - 1][j],  # Deletion
-                                         memo[i][j - 1],  # Insertion
-                                         memo[i - 1][j - 1])  # Substitution
+    def match_phrase(self, sentence_words, i):
+        """
+        Returns the longest multi-word vocabulary value starting at position i, or None
+        """
+        for tokens, phrase, category in self.phrases.get(sentence_words[i], ()):
+            if tuple(sentence_words[i:i + len(tokens)]) == tokens:
+                return tokens, phrase, category
+        return None
 
-        return memo[len(str1)][len(str2)]
+    def known_word(self, word, category):
+        return word in self.basic_dict[category] or word in self.dynamic_dict[category]
 
     def categorize_words(self, sentence):
         """
         Categorize words in a sentence into predefined categories
         """
+        start_time = time.perf_counter()
         sentence_words = sentence.lower().split()
-        categories = []
+        matches = {'location': [], 'food_type': [], 'price_range': []}
         categorized_words = set()
+        uncategorized_words = []
 
-        # Check for "in the" location pattern
-        for i in range(1, len(sentence_words) - 1):
-            if sentence_words[i - 1:i + 1] == ['in', 'the']:
-                location_word = sentence_words[i + 1]
-                if location_word in self.basic_dict['location']:
-                    categories.append((location_word, 'location'))
-                    categorized_words.add(location_word)
-                elif location_word in self.dynamic_dict['location']:
-                    categories.append((location_word, 'location'))
-                    categorized_words.add(location_word)
-
-        # Check for "food" pattern
-        for i in range(1, len(sentence_words)):
-            if sentence_words[i] == 'food' and sentence_words[i - 1] not in self.stopwords:
-                food_type_word = sentence_words[i - 1]
-                if food_type_word in self.basic_dict['food_type']:
-                    categories.append((food_type_word, 'food_type'))
-                    categorized_words.add(food_type_word)
-                elif food_type_word in self.dynamic_dict['food_type']:
-                    categories.append((food_type_word, 'food_type'))
-                    categorized_words.add(food_type_word)
-                else:
-                    self.dynamic_dict['food_type'].add(food_type_word)
-                    categories.append((food_type_word, 'food_type'))
-                    categorized_words.add(food_type_word)
-
-        # Check for "priced" pattern
-        for i in range(2, len(sentence_words)):
-            if sentence_words[i] == 'priced' and sentence_words[i - 1] not in self.stopwords:
-                price_word = sentence_words[i - 1]
-                if price_word in self.basic_dict['price_range']:
-                    categories.append((price_word, 'price_range'))
-                    categorized_words.add(price_word)
-                elif price_word in self.dynamic_dict['price_range']:
-                    categories.append((price_word, 'price_range'))
-                    categorized_words.add(price_word)
-                else:
-                    self.dynamic_dict['price_range'].add(price_word)
-                    categories.append((price_word, 'price_range'))
-                    categorized_words.add(price_word)
+        # Single pass over the sentence, every slot pattern only looks at the two words before and the word after
+        i = 0
+        length = len(sentence_words)
+        while i < length:
+            word = sentence_words[i]
+            phrase = self.match_phrase(sentence_words, i)
+            if phrase:
+                tokens, word, category = phrase
+                matches[category].append((word, category))
+                categorized_words.update(tokens)
+                i += len(tokens)
+                continue
 
-        # Levenshtein distance for uncategorized words
-        categories_list = [
-            ('food_type', self.basic_dict['food_type'], self.dynamic_dict['food_type']),
-            ('price_range', self.basic_dict['price_range'], self.dynamic_dict['price_range']),
-            ('location', self.basic_dict['location'], self.dynamic_dict['location'])
-        ]
+            next_word = sentence_words[i + 1] if i + 1 < length else None
+            after_in_the = i >= 2 and sentence_words[i - 2] == 'in' and sentence_words[i - 1] == 'the'
+
+            # Check for "in the" location pattern
+            if after_in_the and self.known_word(word, 'location'):
+                matches['location'].append((word, 'location'))
+                categorized_words.add(word)
+
+            # Check for "food" pattern
+            if next_word == 'food' and word not in self.stopwords:
+                if not self.known_word(word, 'food_type'):
+                    self.dynamic_dict['food_type'].add(word)
+                matches['food_type'].append((word, 'food_type'))
+                categorized_words.add(word)
 
-        for word in sentence_words:
+            # Check for "priced" pattern
+            if next_word == 'priced' and i >= 1 and word not in self.stopwords:
+                if not self.known_word(word, 'price_range'):
+                    self.dynamic_dict['price_range'].add(word)
+                matches['price_range'].append((word, 'price_range'))
+                categorized_words.add(word)
+
+            uncategorized_words.append(word)
+            i += 1
+
+        categories = matches['location'] + matches['food_type'] + matches['price_range']
+
+        # Levenshtein distance for uncategorized words
+        for word in uncategorized_words:
             if word not in categorized_words and word not in self.stopwords and len(word) >= 3:
-                for category, basic_words, dynamic_words in categories_list:
-                    closest_match = self.apply_levenshtein(word, basic_words) or self.apply_levenshtein(word,
-                                                                                                        dynamic_words)
+                for category in ['food_type', 'price_range', 'location']:
+                    closest_match = self.fuzzy_match(word, category)
                     if closest_match:
                         categories.append((closest_match, category))
-                        dynamic_words.add(closest_match)
+                        self.dynamic_dict[category].add(closest_match)
                         break
 
+        self.record_parse_latency(time.perf_counter() - start_time)
         return categories
+
+    def fuzzy_match(self, word, category):
+        """
+        Find the closest word in the basic or else the dynamic vocabulary of a category, memoized per vocabulary version.
+        A cached answer still counts as a lookup of the dynamic vocabulary when it came from there, so its hits,
+        misses and eviction order are the same as without the cache.
+        """
+        basic_words = self.basic_dict[category]
+        dynamic_words = self.dynamic_dict[category]
+        key = (word, category, basic_words.version, dynamic_words.version)
+
+        cached, entry = self.fuzzy_cache.get(key)
+        if cached:
+            closest_match, searched_dynamic = entry
+            if searched_dynamic:
+                dynamic_words.record_lookup(closest_match)
+            return closest_match
+
+        closest_match = self.apply_levenshtein(word, basic_words)
+        searched_dynamic = closest_match is None
+        if searched_dynamic:
+            closest_match = self.apply_levenshtein(word, dynamic_words)
+        self.fuzzy_cache.put(key, (closest_match, searched_dynamic))
+        return closest_match
+
+    def vocabulary_stats(self):
+        """
+        Returns the size, capacity, hits, misses and evictions of every dynamic vocabulary
+        """
+        return {category: vocabulary.stats() for category, vocabulary in self.dynamic_dict.items()}
+
+    def record_parse_latency(self, seconds):
+        self.parse_latency = seconds
+        self.parse_count += 1
+        self.parse_total_time += seconds
+        self.parse_max_latency = max(self.parse_max_latency, seconds)
+
+    def parse_stats(self):
+        """
+        Returns the latency of the last parse and the mean and max latency over all parsed utterances, in seconds
+        """
+        return {
+            'count': self.parse_count,
+            'last': self.parse_latency,
+            'mean': self.parse_total_time / self.parse_count if self.parse_count else 0.0,
+            'max': self.parse_max_latency,
+        }
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from dialog_system import DialogManager
+
+logger = logging.getLogger('dialog.async')
+
+
+class ConsoleTransport:
+    """Reads user input from stdin in a worker thread, so waiting for the user never blocks the event loop."""
+
+    async def receive(self):
+        return await asyncio.get_running_loop().run_in_executor(None, input, "You: ")
+
+    async def typing(self):
+        print('typing...', end='', flush=True)
+
+    async def send(self, output):
+        print('\r' + f"System: {output}", flush=True)
+
+    async def close(self):
+        pass
+
+
+class QueueTransport:
+    """Exchanges utterances and responses with the rest of the program through asyncio queues."""
+
+    def __init__(self):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def typing(self):
+        pass
+
+    async def send(self, output):
+        await self.outbox.put(output)
+
+    async def close(self):
+        # Tells the other side that the conversation is over
+        await self.outbox.put(None)
+
+
+class ScriptedTransport:
+    """Plays a fixed list of user utterances and records the responses, used for load tests."""
+
+    def __init__(self, utterances):
+        self.utterances = list(utterances)
+        self.responses = []
+
+    async def receive(self):
+        if not self.utterances:
+            raise EOFError("The script has no utterances left")
+        return self.utterances.pop(0)
+
+    async def typing(self):
+        pass
+
+    async def send(self, output):
+        self.responses.append(output)
+
+    async def close(self):
+        pass
+
+
+class AsyncDialogManager(DialogManager):
+    """
+    Dialog manager for asyncio. The turns are handled by the same step function as DialogManager, the responses
+    are sent through an async transport with asyncio.sleep for the typing delay, so one event loop can hold many
+    conversations at once.
+    """
+
+    def __init__(self, *args, transport=None, classifier=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transport = transport or ConsoleTransport()
+        # A MicroBatchClassifier shared by the conversations, their turns are then classified together in batches
+        self.classifier = classifier
+        self.session = self.new_session()
+
+    async def send(self, responses):
+        """Sends responses with the typing delay."""
+        for output in responses:
+            await self.transport.typing()
+            await asyncio.sleep(self.response_delay)
+            await self.transport.send(output)
+
+    async def handle_turn(self, user_utterance):
+        """Handles a user utterance and sends the responses."""
+        try:
+            dialog_act = None
+            if self.classifier is not None:
+                dialog_act = await asyncio.wrap_future(self.classifier.submit(user_utterance))
+            self.session, responses = self.step(self.session, user_utterance, dialog_act)
+        except Exception:
+            # step does not change the session it is given, so the conversation goes on from the last good state
+            logger.exception("Failed to handle the utterance %r", user_utterance)
+            responses = ["Sorry, something went wrong. Could you say that again?"]
+        await self.send(responses)
+
+    async def run(self):
+        """Runs the dialog system, the transport is closed however the conversation ends."""
+        try:
+            # Welcome the user, the remembered preferences are read in a worker thread so the event loop never waits
+            self.session, responses = await asyncio.get_running_loop().run_in_executor(None, self.start, self.session)
+            await self.send(responses)
+
+            while self.session.state != "goodbye":
+                try:
+                    user_input = (await self.transport.receive()).lower()
+                except EOFError:
+                    break  # The user has gone
+                await self.handle_turn(user_input)
+        finally:
+            await self.transport.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(AsyncDialogManager(1, 2, "conversational", True, True).run())
@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatchClassifier:
+    """Gathers utterances from concurrent callers for a few milliseconds and classifies them in one call."""
+
+    def __init__(self, classify_batch, max_batch_size=1024, max_wait=0.005):
+        self.classify_batch = classify_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.classified = 0
+        self.running = True
+        # Held while checking closed and queueing, so no request can end up behind the stop marker of close
+        self.lock = threading.Lock()
+        self.closed = False
+        self.worker = threading.Thread(target=self.process_requests, daemon=True)
+        self.worker.start()
+
+    def submit(self, utterance):
+        """Queue an utterance and return a future that resolves to its dialog act, raises once closed."""
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Cannot classify with a closed MicroBatchClassifier")
+            self.requests.put((utterance, future))
+        return future
+
+    def classify(self, utterance, timeout=None):
+        """Classify a single utterance, blocking until the batch it ended up in is done."""
+        return self.submit(utterance).result(timeout)
+
+    def collect_batch(self):
+        """Wait for a first request, then keep collecting until the batch is full or max_wait has passed."""
+        batch = [self.requests.get()]
+        if batch[0] is None:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self.running = False
+                break
+            batch.append(request)
+        return batch
+
+    def process_requests(self):
+        while self.running:
+            batch = self.collect_batch()
+            if not batch:
+                break
+
+            utterances = [utterance for utterance, _ in batch]
+            try:
+                labels = self.classify_batch(utterances)
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+
+            for (_, future), label in zip(batch, labels):
+                future.set_result(label)
+            self.batches += 1
+            self.classified += len(batch)
+
+    def close(self):
+        """Stop the worker after the requests that are already queued have been classified."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.requests.put(None)
+        self.worker.join()
@@ -0,0 +1,50 @@
+"""Benchmark the dialog act classifier for single utterances, batches and the micro-batching queue."""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from assignment_1a.data_processing import load_data
+from batch_classifier import MicroBatchClassifier
+from dialog_system import DialogManager
+
+
+def benchmark_batches(sentences, batch_size, repeats=3):
+    """Returns the best utterances/sec out of a few runs when classifying in batches of batch_size."""
+    best = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(0, len(sentences), batch_size):
+            DialogManager.classify_batch(sentences[i:i + batch_size])
+        best = max(best, len(sentences) / (time.perf_counter() - start))
+    return best
+
+
+def benchmark_queue(sentences, clients=32):
+    """Returns utterances/sec when many threads classify one utterance at a time through the queue."""
+    batcher = MicroBatchClassifier(DialogManager.classify_batch)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(batcher.classify, sentences))
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    return len(sentences) / elapsed, batcher.classified / max(batcher.batches, 1)
+
+
+def main(filepath='../data/dialog_acts.dat'):
+    sentences = [sentence for _, sentence in load_data(filepath)]
+
+    # The single utterance path has to return exactly the same labels
+    sample = sentences[:500]
+    assert DialogManager.classify_batch(sample) == [DialogManager.classify_batch([s])[0] for s in sample]
+
+    for batch_size in [1, 32, 1024, len(sentences)]:
+        # Batch size 1 is slow, so a slice of the data is enough to measure it
+        data = sentences[:2000] if batch_size == 1 else sentences
+        print(f"batch size {batch_size:>6}: {benchmark_batches(data, batch_size):>12,.0f} utterances/sec")
+
+    throughput, mean_batch = benchmark_queue(sentences[:5000])
+    print(f"micro-batching queue (32 clients): {throughput:,.0f} utterances/sec, mean batch size {mean_batch:.1f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,54 @@
+"""Benchmark the vectorized inference rules against the row-wise DataFrame.apply version."""
+
+import sys
+import timeit
+import pandas as pd
+from benchmark_restaurants import synthetic_restaurants
+from restaurant_selector import RestaurantSelector
+
+
+def apply_inference_rules_row(restaurant):
+    """Row-wise evaluation of the same rules, the way RestaurantSelector used to do it with DataFrame.apply."""
+    properties = {}
+    if restaurant['pricerange'] == 'cheap' and restaurant['length_of_stay'] == 'short':
+        properties['touristic'] = True
+    if restaurant['food'] == 'romanian':
+        properties['touristic'] = False
+    if restaurant['crowdedness'] == 'busy':
+        properties['assigned_seats'] = True
+    if restaurant['length_of_stay'] == 'long':
+        properties['suitable_for_children'] = False
+    if restaurant['crowdedness'] == 'busy':
+        properties['romantic'] = False
+    if restaurant['length_of_stay'] == 'long':
+        properties['romantic'] = True
+    for key, value in properties.items():
+        restaurant[key] = value
+    return restaurant
+
+
+def main(csv_path='../data/restaurant_info.csv', max_row_wise=100_000):
+    max_row_wise = int(max_row_wise)
+    selector = RestaurantSelector(csv_path)
+    restaurants_df = pd.read_csv(csv_path)
+
+    # Both versions have to infer the same properties
+    row_wise = restaurants_df.apply(apply_inference_rules_row, axis=1)
+    vectorized = selector.apply_inference_rules(restaurants_df)
+    pd.testing.assert_frame_equal(row_wise.astype(object), vectorized[row_wise.columns].astype(object))
+
+    print(f"{'rows':>9} {'row-wise':>16} {'vectorized':>16}  (restaurants/sec)")
+    for rows in [len(restaurants_df), 10_000, 100_000, 1_000_000]:
+        synthetic_df = synthetic_restaurants(restaurants_df, rows)
+        vectorized = rows / timeit.timeit(lambda: selector.apply_inference_rules(synthetic_df), number=1)
+        # The row-wise version takes minutes on the largest tables
+        if rows <= max_row_wise:
+            row_wise = rows / timeit.timeit(lambda: synthetic_df.apply(apply_inference_rules_row, axis=1), number=1)
+            row_wise = f"{row_wise:>16,.0f}"
+        else:
+            row_wise = f"{'-':>16}"
+        print(f"{rows:>9,} {row_wise} {vectorized:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
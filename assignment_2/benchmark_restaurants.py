@@ -0,0 +1,55 @@
+"""Benchmark the restaurant index against the pandas str.contains filters on the real and a synthetic table."""
+
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+from restaurant_index import RestaurantIndex
+
+
+def contains_filter(restaurants_df, food_type, price_range, area):
+    """The filters RestaurantSelector used before the index, kept as a reference."""
+    filtered_df = restaurants_df
+    filtered_df = filtered_df[filtered_df['food'].str.contains(food_type, case=False, na=False)]
+    filtered_df = filtered_df[filtered_df['pricerange'].str.contains(price_range, case=False, na=False)]
+    filtered_df = filtered_df[filtered_df['area'].str.contains(area, case=False, na=False)]
+    return filtered_df
+
+
+def synthetic_restaurants(restaurants_df, rows, seed=42):
+    """Sample every column independently from the real table to get a large table with the same values."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({column: restaurants_df[column].to_numpy()[rng.integers(0, len(restaurants_df), rows)]
+                         for column in restaurants_df.columns})
+
+
+def benchmark(restaurants_df, queries, number):
+    build = timeit.timeit(lambda: RestaurantIndex(restaurants_df), number=1)
+    index = RestaurantIndex(restaurants_df)
+
+    def run_contains():
+        for query in queries:
+            contains_filter(restaurants_df, *query)
+
+    def run_index(substring):
+        for food_type, price_range, area in queries:
+            restaurants_df.iloc[index.select(substring, food=food_type, pricerange=price_range, area=area)]
+
+    per_query = len(queries) * number
+    print(f"{len(restaurants_df):>9,} rows, index built in {build * 1000:.1f} ms (us per query)")
+    print(f"  str.contains   {timeit.timeit(run_contains, number=number) / per_query * 1e6:>10.1f}")
+    print(f"  index exact    {timeit.timeit(lambda: run_index(False), number=number) / per_query * 1e6:>10.1f}")
+    print(f"  index substring{timeit.timeit(lambda: run_index(True), number=number) / per_query * 1e6:>10.1f}")
+
+
+def main(csv_path='../data/restaurant_info.csv'):
+    restaurants_df = pd.read_csv(csv_path)
+    queries = [('chinese', 'cheap', 'centre'), ('italian', 'moderate', 'north'),
+               ('british', 'expensive', 'west'), ('indian', 'cheap', 'south')]
+
+    benchmark(restaurants_df, queries, number=200)
+    benchmark(synthetic_restaurants(restaurants_df, 1_000_000), queries, number=2)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,74 @@
+"""Measure memory per idle session and turns/sec of the dialog server, in-process and over TCP."""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dialog_server import DialogServer
+from memory_store import MemoryLog, WriteBehindMemory
+
+SCRIPT = ['cheap chinese food in the centre', 'no', 'no']
+
+
+def memory_per_idle_session(server, sessions=10_000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(sessions):
+        server.handle_message({"session": f"idle-{i}"})
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    for i in range(sessions):
+        server.sessions.remove(f"idle-{i}")
+    return used / sessions
+
+
+def in_process_turns_per_sec(server, conversations=2000):
+    start = time.perf_counter()
+    turns = 0
+    for i in range(conversations):
+        server.handle_message({"session": f"local-{i}"})
+        for text in SCRIPT:
+            server.handle_message({"session": f"local-{i}", "text": text})
+            turns += 1
+    return turns / (time.perf_counter() - start)
+
+
+async def tcp_turns_per_sec(server, clients=50, conversations_per_client=20, port=8766):
+    tcp_server = await asyncio.start_server(server.handle_connection, '127.0.0.1', port)
+
+    async def client(client_id):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for conversation in range(conversations_per_client):
+            session_id = f"tcp-{client_id}-{conversation}"
+            for text in [None] + SCRIPT:
+                writer.write(json.dumps({"session": session_id, "text": text}).encode('utf-8') + b'\n')
+                await writer.drain()
+                json.loads(await reader.readline())
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    tcp_server.close()
+    await tcp_server.wait_closed()
+    return clients * conversations_per_client * len(SCRIPT) / elapsed
+
+
+def main(idle_sessions=10_000):
+    memory_backend = WriteBehindMemory(MemoryLog(os.path.join(tempfile.mkdtemp(), 'memory.jsonl')))
+    server = DialogServer(memory_backend=memory_backend)
+    # Warm up the shared components before measuring
+    in_process_turns_per_sec(server, conversations=10)
+
+    print(f"memory per idle session: {memory_per_idle_session(server, int(idle_sessions)):,.0f} bytes")
+    print(f"in-process: {in_process_turns_per_sec(server):,.0f} turns/sec on one core")
+    print(f"TCP localhost, 50 clients: {asyncio.run(tcp_turns_per_sec(server)):,.0f} turns/sec on one core")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,49 @@
+"""
+Benchmark the compiled state transition table.
+Its outcomes are pinned to those of the if/elif chain it replaced by tests/test_state_transitions.py.
+"""
+
+import sys
+import tempfile
+import timeit
+from dialog_system import DialogManager
+from memory_store import MemoryLog
+from restaurant_selector import RestaurantSelector
+from state_machine import TRANSITIONS
+
+
+def dialog_for(selector, state, style):
+    dialog = DialogManager(2, 0, style, False, False, restaurant_selector=selector)
+    dialog.state = state
+    dialog.preferences.update(location='centre', food_type='chinese')
+    dialog.restaurant = selector.restaurants_df.iloc[0]
+    dialog.recommendations = {1: selector.restaurants_df.iloc[0], 2: selector.restaurants_df.iloc[1]}
+    dialog.memory_options = [{'food_type': 'chinese', 'area': 'centre', 'price_range': 'cheap',
+                              'user_preferences': dict(dialog.preferences, price_range='cheap')}]
+    return dialog
+
+
+def dispatch_time(selector, number=20_000):
+    """Seconds per handle_state call on transitions that only dispatch and queue a response."""
+    dialog = dialog_for(selector, 'welcome', 'efficient')
+    cases = [(state, 'null') for state in TRANSITIONS if state.startswith('ask_') and state != 'ask_specific_requirements']
+    cases += [('welcome', 'null'), ('ask_specific_requirements', 'affirm'), ('provide_postalcode', 'negate'),
+              ('request_further_details', 'negate'), ('provide_address', 'negate')]
+
+    def run():
+        for state, dialog_act in cases:
+            dialog.state = state
+            dialog.handle_state(dialog_act, '')
+        dialog.outbox.clear()
+
+    return timeit.timeit(run, number=number) / (number * len(cases))
+
+
+def main(csv_path='../data/restaurant_info.csv'):
+    with tempfile.TemporaryDirectory() as memory_dir:
+        selector = RestaurantSelector(csv_path, memory_backend=MemoryLog(f"{memory_dir}/memory.jsonl"))
+        print(f"compiled table: {dispatch_time(selector) * 1e9:8.0f} ns per transition")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
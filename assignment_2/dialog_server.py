@@ -0,0 +1,194 @@
+"""Multi-session dialog server speaking line-delimited JSON over TCP on localhost."""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from batch_classifier import MicroBatchClassifier
+from dialog_system import DialogManager
+from memory_store import DEFAULT_USER
+
+logger = logging.getLogger('dialog.server')
+
+
+class InvalidRequest(ValueError):
+    """A request line that is not a JSON object with a session id and optional user and text strings."""
+
+
+def parse_request(line):
+    """Decode and check one request line, raises InvalidRequest when it is malformed."""
+    try:
+        message = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError) as error:
+        raise InvalidRequest(f"not valid JSON ({error})")
+    if not isinstance(message, dict):
+        raise InvalidRequest("expected a JSON object")
+    session_id = message.get("session")
+    if isinstance(session_id, bool) or not isinstance(session_id, (str, int)):
+        raise InvalidRequest("'session' must be a string or an integer")
+    if not isinstance(message.get("text", ""), (str, type(None))):
+        raise InvalidRequest("'text' must be a string")
+    if not isinstance(message.get("user", DEFAULT_USER), str):
+        raise InvalidRequest("'user' must be a string")
+    return message
+
+
+class Session:
+    """A conversation in the session table: its id, its dialog state record and when it was last active."""
+
+    __slots__ = ('session_id', 'dialog', 'last_active')
+
+    def __init__(self, session_id, dialog):
+        self.session_id = session_id
+        self.dialog = dialog
+        self.last_active = time.monotonic()
+
+
+class SessionTable:
+    """Sessions by id, kept in order of last activity so idle sessions are evicted from the front."""
+
+    def __init__(self, idle_timeout=600):
+        self.idle_timeout = idle_timeout
+        self.sessions = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_active = time.monotonic()
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def add(self, session):
+        self.sessions[session.session_id] = session
+
+    def remove(self, session_id):
+        self.sessions.pop(session_id, None)
+
+    def evict_idle(self, now=None):
+        """Remove the sessions that have been idle for longer than idle_timeout, returns how many were removed."""
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if now - session.last_active < self.idle_timeout:
+                break
+            self.sessions.popitem(last=False)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+
+class DialogServer:
+    """
+    Serves many conversations with one dialog manager: every turn is a call of its step function on the state
+    record of the session. The text processor, restaurant selector and classifier are therefore loaded once and
+    shared by all sessions. The turns run one after another in a worker thread, so a turn that waits on the memory
+    or the classifier never blocks the event loop and the shared dialog manager is never used by two turns at once.
+    With micro_batching the utterances of connections that arrive together are classified in one batch first.
+    """
+
+    def __init__(self, amount_of_recommendations=1, language_style="efficient", memory=False, idle_timeout=600,
+                 micro_batching=True, **dialog_kwargs):
+        self.dialog_manager = DialogManager(amount_of_recommendations, 0, language_style, False, memory,
+                                            **dialog_kwargs)
+        self.sessions = SessionTable(idle_timeout)
+        self.turns = 0
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.classifier = MicroBatchClassifier(DialogManager.classify_batch) if micro_batching else None
+
+    def handle_message(self, message, dialog_act=None):
+        """
+        Handles one request {"session": id, "user": user id, "text": utterance} and returns
+        {"session": id, "responses": [...], "state": state, "done": bool}. The first message of a session starts
+        the conversation, its text is optional. The request is expected to have passed parse_request, dialog_act
+        can be given when the text has already been classified.
+        """
+        session_id = str(message["session"])
+        text = message.get("text") or ""
+        session = self.sessions.get(session_id)
+
+        if session is None:
+            dialog = self.dialog_manager.new_session(message.get("user", DEFAULT_USER))
+            dialog, responses = self.dialog_manager.start(dialog)
+            session = Session(session_id, dialog)
+            self.sessions.add(session)
+        else:
+            responses = []
+
+        if text:
+            session.dialog, turn_responses = self.dialog_manager.step(session.dialog, text.lower(), dialog_act)
+            responses += turn_responses
+            self.turns += 1
+
+        done = session.dialog.state == "goodbye"
+        if done:
+            self.sessions.remove(session_id)
+        return {"session": session_id, "responses": responses, "state": session.dialog.state, "done": done}
+
+    async def handle_connection(self, reader, writer):
+        """
+        Reads one JSON request per line and writes one JSON reply per line, until the client disconnects.
+        A malformed request is answered with an "Invalid request" error, a failure while handling a valid one with
+        a "Server error", and the connection is closed however the loop ends.
+        """
+        try:
+            while line := await reader.readline():
+                try:
+                    message = parse_request(line)
+                except InvalidRequest as error:
+                    reply = {"error": f"Invalid request: {error}"}
+                else:
+                    try:
+                        dialog_act = None
+                        if self.classifier is not None and message.get("text"):
+                            dialog_act = await asyncio.wrap_future(self.classifier.submit(message["text"].lower()))
+                        reply = await asyncio.get_running_loop().run_in_executor(self.executor, self.handle_message,
+                                                                                 message, dialog_act)
+                    except Exception as error:
+                        logger.exception("Failed to handle the request %r", message)
+                        reply = {"error": f"Server error: {type(error).__name__}"}
+                writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass  # The client went away, there is nobody left to reply to
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def evict_idle_sessions(self):
+        while True:
+            await asyncio.sleep(max(self.sessions.idle_timeout / 4, 1))
+            # In the worker thread as well, so it never changes the session table during a turn
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.sessions.evict_idle)
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        evictor = asyncio.create_task(self.evict_idle_sessions())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            evictor.cancel()
+            self.close()
+
+    def close(self):
+        """Stop the classifier batcher and the turn worker after the work that is already queued."""
+        if self.classifier is not None:
+            self.classifier.close()
+        self.executor.shutdown()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    print(f"Serving dialogs on 127.0.0.1:{port}")
+    asyncio.run(DialogServer().serve(port=port))
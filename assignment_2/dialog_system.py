@@ -1,13 +1,51 @@
-from assignment_1a.DecisionTreeClassifier import vectorizer, clf_tree
 from algorithm import TextProcessor
-from restaurant_selector import RestaurantSelector
+from memory_store import DEFAULT_USER, default_memory_backend
+from state_machine import TRANSITIONS, compile_transitions
+import threading
 import time
-import json
-import os
+
+# The classifier, pandas and the restaurant table are imported on first use, so the welcome does not wait for them
+
+# The dialog state that belongs to one conversation, everything else in DialogManager can be shared
+SESSION_FIELDS = ('state', 'preferences', 'response', 'restaurant', 'changes_counter', 'recommendations',
+                  'memory_options', 'user_id')
+
+
+def load_classifier():
+    """Imports the Decision Tree, loaded from its saved bundle, the first time an utterance is classified."""
+    from assignment_1a.DecisionTreeClassifier import vectorizer, clf_tree
+    return vectorizer, clf_tree
+
+
+class SessionState:
+    """Compact record of the state of one conversation."""
+
+    __slots__ = SESSION_FIELDS
+
+    def __init__(self, user_id=DEFAULT_USER, preference_names=()):
+        self.state = "welcome"
+        self.preferences = dict.fromkeys(preference_names)
+        self.response = True
+        self.restaurant = None
+        self.changes_counter = 0
+        self.recommendations = {}
+        self.memory_options = []
+        self.user_id = user_id
+
+    def copy(self):
+        """Copy of the record, with its own preferences, recommendations and memory options containers."""
+        state = SessionState.__new__(SessionState)
+        for field in SESSION_FIELDS:
+            setattr(state, field, getattr(self, field))
+        state.preferences = dict(self.preferences)
+        state.recommendations = dict(self.recommendations)
+        state.memory_options = list(self.memory_options)
+        return state
 
 
 class DialogManager:
-    def __init__(self, amount_of_recommendations, response_delay, language_style, transparent, memory):
+    def __init__(self, amount_of_recommendations, response_delay, language_style, transparent, memory,
+                 user_id=DEFAULT_USER, memory_backend=None, text_processor=None, restaurant_selector=None):
         self.state = "welcome"
         self.preferences = {
             "location": None,
@@ -21,23 +59,46 @@ class DialogManager:
         self.response = True
         self.restaurant = None
         self.amount_of_recommendations = amount_of_recommendations
-        self.text_processor = TextProcessor()
-        self.restaurant_selector = RestaurantSelector()
+        # The text processor and restaurant selector can be shared by many dialogs, a selector that is not given
+        # is loaded the first time it is needed
+        self.text_processor = text_processor or TextProcessor()
+        self.load_lock = threading.Lock()
+        self._restaurant_selector = restaurant_selector
+        # The remembered preferences are read for the welcome, without loading the restaurant table
+        if restaurant_selector is not None:
+            memory_backend = restaurant_selector.memory_backend
+        self.memory_backend = memory_backend if memory_backend is not None else default_memory_backend()
+        self.recommendations = {}
+        self.memory_options = []
+        self.outbox = []
         self.changes_counter = 0
         self.preferences_name = list(self.preferences.keys())
-        self.rules = {
-            1: {'antecedents': [('price_range', 'cheap'), ('food_quality', 'good')], 'consequent': ('touristic', True), 'description': 'A cheap restaurant with good food attracts tourists'},
-            2: {'antecedents': [('cuisine', 'Romanian')], 'consequent': ('touristic', False), 'description': 'Romanian cuisine is unknown for most tourists and they prefer familiar food'},
-            3: {'antecedents': [('crowdedness', 'busy')], 'consequent': ('assigned_seats', True), 'description': 'In a busy restaurant the waiter decides where you sit'},
-            4: {'antecedents': [('stay_duration', 'long')], 'consequent': ('suitable_for_children', False), 'description': 'Spending a long time is not advised when taking children'},
-            5: {'antecedents': [('crowdedness', 'busy')], 'consequent': ('romantic', False), 'description': 'A busy restaurant is not romantic'},
-            6: {'antecedents': [('stay_duration', 'long')], 'consequent': ('romantic', True), 'description': 'Spending a long time in a restaurant is romantic'},
-        }
         # Variables for anthropomorphic system
         self.response_delay = response_delay
         self.language_style = language_style
         self.transparent = transparent
         self.memory = memory
+        self.user_id = user_id
+
+    @property
+    def restaurant_selector(self):
+        """The restaurant selector, loaded from its snapshot on first use."""
+        if self._restaurant_selector is None:
+            with self.load_lock:
+                if self._restaurant_selector is None:
+                    from restaurant_selector import RestaurantSelector
+                    self._restaurant_selector = RestaurantSelector(memory_backend=self.memory_backend)
+        return self._restaurant_selector
+
+    @property
+    def rules(self):
+        from inference_rules import RULES
+        return RULES
+
+    def warm_up(self):
+        """Loads the classifier and the restaurant table, run in the background while the user reads the welcome."""
+        load_classifier()
+        self.restaurant_selector
 
     def generate_response(self, efficient_text, conversational_text):
         """Generates the response based on the language style."""
@@ -49,27 +110,39 @@ class DialogManager:
             return efficient_text  # Default to efficient if style is undefined
 
     def println(self, efficient_output, conversational_output):
-        """Prints the output with a typing effect for delay of response."""
-        typing_text = 'typing...'
-        print(typing_text, end='', flush=True)
-        time.sleep(self.response_delay)  # Wait for 2 seconds
-        output = self.generate_response(efficient_output, conversational_output)
-        print('\r' + f"System: {output}", end='', flush=True)
-        print()
+        """Queues the output in the language style, it is shown when the turn is done."""
+        self.outbox.append(self.generate_response(efficient_output, conversational_output))
 
     def print_single_ln(self, output):
-        """Prints the output line with delay"""
-        typing_text = 'typing...'
-        print(typing_text, end='', flush=True)
-        time.sleep(self.response_delay)  # Wait for 2 seconds
-        print('\r' + f"System: {output}", end='', flush=True)
-        print()
+        """Queues the output line, it is shown when the turn is done."""
+        self.outbox.append(output)
+
+    def take_responses(self):
+        """Returns the queued responses and empties the outbox."""
+        responses, self.outbox = self.outbox, []
+        return responses
+
+    def display(self, responses):
+        """Prints the responses with a typing effect for delay of response."""
+        for output in responses:
+            typing_text = 'typing...'
+            print(typing_text, end='', flush=True)
+            time.sleep(self.response_delay)  # Wait for 2 seconds
+            print('\r' + f"System: {output}", end='', flush=True)
+            print()
 
     def classify_dialog_act(self, user_utterance):
         """Classify the dialog act of the user utterance using the Decision Tree classifier."""
-        input_bow = vectorizer.transform([user_utterance])
-        prediction = clf_tree.predict(input_bow)
-        return prediction[0]
+        return self.classify_batch([user_utterance])[0]
+
+    @staticmethod
+    def classify_batch(utterances):
+        """Classify many utterances with a single sparse vectorizer and Decision Tree call."""
+        if not utterances:
+            return []
+        vectorizer, clf_tree = load_classifier()
+        input_bow = vectorizer.transform(utterances)
+        return list(clf_tree.predict(input_bow))
 
     def get_response(self):
         """Returns the response based on the current state and formality level."""
@@ -171,7 +244,9 @@ class DialogManager:
             self.preferences['food_type'],
             self.preferences['price_range'],
             self.preferences['location'],
-            self.preferences  # Pass the inferred properties
+            self.preferences,  # Pass the inferred properties
+            self.user_id,
+            self.print_single_ln
         )
         if isinstance(filtered_restaurants, str):
             self.print_single_ln(filtered_restaurants)
@@ -194,216 +269,220 @@ class DialogManager:
                 self.print_single_ln(f"We recommend you '{recommendation['restaurantname']}', a(n) {recommendation['pricerange']} {recommendation['food']} restaurant in the {recommendation['area']}.")
                 self.restaurant = recommendations[1]
 
+        self.state = "request_further_details"
         if self.amount_of_recommendations > 1:
             self.recommendation_selector(recommendations)
 
-        self.state = "request_further_details"
-
     def recommendation_selector(self, recommendations):
-        """Selects a restaurant from the recommendations based on user input."""
+        """Asks the user to select a restaurant from the recommendations, the answer is handled in the next turn."""
+        self.recommendations = recommendations
         self.println(f"Which restaurant do you want more information about {tuple(recommendations.keys())}?",
                      f"Which restaurant would you like more information about? Please select a number from {tuple(recommendations.keys())}.")
+        self.state = "select_recommendation"
 
-        while True:
-            user_input = int(input("You: "))
-            if user_input in recommendations.keys():
-                self.restaurant = recommendations[user_input]
-                self.println(f"You selected '{self.restaurant['restaurantname']}'. Do you want the phone number?",
-                             f"Great choice! Do you want the phone number of '{self.restaurant['restaurantname']}'?")
-                break
-            else:
-                self.println("Invalid selection.",
-                             f"Number {user_input} is not available. Please select a valid recommendation number.")
+    def select_recommendation(self, user_input):
+        """Selects a restaurant from the recommendations based on user input."""
+        selection = int(user_input) if user_input.strip().isdigit() else user_input
+        if selection in self.recommendations.keys():
+            self.restaurant = self.recommendations[selection]
+            self.println(f"You selected '{self.restaurant['restaurantname']}'. Do you want the phone number?",
+                         f"Great choice! Do you want the phone number of '{self.restaurant['restaurantname']}'?")
+            self.state = "request_further_details"
+        else:
+            self.println("Invalid selection.",
+                         f"Number {user_input} is not available. Please select a valid recommendation number.")
+
+    # Slot of each ask state, with its (efficient, conversational) confirmation, no preference and ask again texts
+    SLOT_RESPONSES = {
+        'ask_location': ('location',
+                         ("Location: {}.", "Got it, you're looking for a restaurant in {}."),
+                         ("No location preference.",
+                          "Understood, you don't have a specific location in mind for the restaurant."),
+                         ("Where do you want to find a restaurant? (north, south, east, west, dontcare)",
+                          "Could you please tell me the location you want to find a restaurant? (north, south, east, west, dontcare)")),
+        'ask_food_type': ('food_type',
+                          ("Looking for {} food.", "Great, you're looking for {} food."),
+                          ("No food type chosen.", "Understood, you don't have a specific food type in mind."),
+                          ("What kind of food do you want? (e.g. Italian, Chinese)",
+                           "Could you please tell me the type of food you prefer? (e.g. Italian, Chinese)")),
+        'ask_price_range': ('price_range',
+                            ("Looking for a(n) {} restaurant.", "You're looking for a(n) {} restaurant."),
+                            ("No specific price range.", "Understood, you don't have a specific price range in mind."),
+                            ("In what price range (cheap, moderate, expensive)?",
+                             "Could you please tell me your price range (choose from cheap, moderate, expensive)?")),
+    }
 
     def handle_state(self, dialog_act, user_utterance):
-        """Handles the dialog state based on the dialog act and user utterance."""
-        if self.state == "welcome":
-            if dialog_act == "hello":
-                self.println("Please provide a location. (centre, north, south, east, west)",
-                             "Where would you like to find a restaurant? (centre, north, south, east, west)")
-                self.state = "ask_location"
-            elif dialog_act == "inform":
-                self.extract_preferences(user_utterance)
-                self.response = False
-                non_none_preferences = [key for key, value in self.preferences.items() if value is not None]
-                if len(non_none_preferences) > 0:
-                    self.redirection(non_none_preferences[0])
-                else:
-                    self.state = "ask_location"
-            elif dialog_act == "restart":
-                self.reset_dialog()
-            elif dialog_act in ["bye", "negate"]:
-                self.state = "goodbye"
-                self.println(*self.get_response())
-            else:
-                self.println("Sorry, didn't understand.",
-                             "Hmm, I didn’t quite catch that. Could you tell me your preferences again?")
-
-        elif self.state == "start_over":
-            self.reset_dialog()
-
-        elif self.state == "ask_location":
-            if dialog_act == "inform":
-                self.extract_preferences(user_utterance, 'location')
-                if self.preferences["location"]:
-                    if self.preferences["location"] == 'blank':
-                        self.println("No location preference.",
-                                     "Understood, you don't have a specific location in mind for the restaurant.")
-                    else:
-                        self.println(f"Location: {self.preferences['location']}.",
-                                     f"Got it, you're looking for a restaurant in {self.preferences['location']}.")
-                    self.redirection("location")
-                else:
-                    self.println("Where do you want to find a restaurant? (north, south, east, west, dontcare)",
-                                 "Could you please tell me the location you want to find a restaurant? (north, south, east, west, dontcare)")
-            elif dialog_act in ["bye", "negate"]:
-                self.state = "goodbye"
-                self.println(*self.get_response())
-
-        elif self.state == "ask_food_type":
-            if dialog_act == "inform":
-                self.extract_preferences(user_utterance, 'food_type')
-                if self.preferences["food_type"]:
-                    if self.preferences["food_type"] == 'blank':
-                        self.println("No food type chosen.",
-                                     "Understood, you don't have a specific food type in mind.")
-                    else:
-                        self.println(f"Looking for {self.preferences['food_type']} food.",
-                                     f"Great, you're looking for {self.preferences['food_type']} food.")
-                    self.redirection("food_type")
-                else:
-                    self.println("What kind of food do you want? (e.g. Italian, Chinese)",
-                                 "Could you please tell me the type of food you prefer? (e.g. Italian, Chinese)")
-            elif dialog_act in ["bye", "negate"]:
-                self.state = "goodbye"
-                self.println(*self.get_response())
-
-        elif self.state == "ask_price_range":
-            if dialog_act == "inform":
-                self.extract_preferences(user_utterance, 'price_range')
-                if self.preferences["price_range"]:
-                    if self.preferences["price_range"] == 'blank':
-                        self.println("No specific price range.",
-                                     "Understood, you don't have a specific price range in mind.")
-                    else:
-                        self.println(f"Looking for a(n) {self.preferences['price_range']} restaurant.",
-                                     f"You're looking for a(n) {self.preferences['price_range']} restaurant.")
-                    self.redirection("price_range")
-                else:
-                    self.println("In what price range (cheap, moderate, expensive)?",
-                                 "Could you please tell me your price range (choose from cheap, moderate, expensive)?")
-            elif dialog_act in ["bye", "negate"]:
-                self.state = "goodbye"
-                self.println(*self.get_response())
-
-        elif self.state == "ask_specific_requirements":
-            if dialog_act == "negate":
-                self.response = False
-                self.state = "make_recommendation"
-            elif dialog_act == "affirm":
-                self.println("Any specific requirements like a romantic setting or a place suitable for children?",
-                             "Please specify if you need a romantic setting, touristic restaurant, assigned seats or a place suitable for children.")
-            else:
-                self.extract_additional_preferences(user_utterance)
-                self.response = False
-                self.state = "make_recommendation"
+        """Handles the dialog state based on the dialog act and user utterance, with the table of state_machine.py."""
+        by_act, default = TRANSITION_TABLE[self.state]
+        handler, text, next_state = by_act.get(dialog_act, default)
+        if text is not None:
+            self.println(*text)
+        if handler is not None:
+            getattr(self, handler)(dialog_act, user_utterance)
+        if next_state is not None:
+            self.state = next_state
+
+    def on_preferences(self, dialog_act, user_utterance):
+        self.extract_preferences(user_utterance)
+        self.response = False
+        non_none_preferences = [key for key, value in self.preferences.items() if value is not None]
+        if len(non_none_preferences) > 0:
+            self.redirection(non_none_preferences[0])
+        else:
+            self.state = "ask_location"
 
-        elif self.state == "make_recommendation":
-            self.make_recommendation()
+    def on_restart(self, dialog_act, user_utterance):
+        self.reset_dialog()
 
-        elif self.state == "no_match":
-            if dialog_act == "negate":
-                self.println("Sorry, Goodbye!",
-                             "Sorry, have a great day! Goodbye.")
-                self.state = "change_preferences"
-            else:
-                self.response = False
-                self.state = "changes"
-
-        elif self.state == "changes":
-            if dialog_act == "inform":
-                self.changes_counter -= 1
-            elif dialog_act == "negate":
-                self.println("Okay!", "Okay!")
-            else:
-                self.preferences[self.preferences_name[self.changes_counter]] = None
-            self.changes_counter += 1
+    def on_goodbye(self, dialog_act, user_utterance):
+        self.state = "goodbye"
+        self.println(*self.get_response())
 
-            if self.changes_counter == 3:
-                self.changes_counter = 0
-                self.response = False
-                self.state = "welcome"
-            else:
-                self.println(f"Change the {self.preferences_name[self.changes_counter]} of the restaurant? (Yes/No)",
-                             f"Do you want to change the {self.preferences_name[self.changes_counter]} of the restaurant? (Yes/No)")
-                self.state = "changes"
-
-        elif self.state == "request_further_details":
-            if dialog_act == "negate":
-                self.println("Okay, Goodbye!",
-                             "Okay, have a great day! Goodbye.")
-                self.state = "goodbye"
-            else:
-                self.println(f"Phone number: {self.restaurant['phone']}. Do you want the address?",
-                             f"The phone number is {self.restaurant['phone']}. Do you want the address?")
-                self.state = "provide_address"
-
-        elif self.state == "provide_address":
-            if dialog_act == "negate":
-                self.println("Alright Goodbye!",
-                             "Alright. Thank you, goodbye!")
-                self.state = "goodbye"
-            else:
-                self.println(f"Adress: {self.restaurant['addr']}. Do you want the postal code?",
-                             f"The address is {self.restaurant['addr']}. Would you like the postal code?")
-                self.state = "provide_postalcode"
-
-        elif self.state == "provide_postalcode":
-            if dialog_act == "negate":
-                self.println("Okay, Goodbye!",
-                             "Okay, have a nice day!")
-                self.state = "goodbye"
+    def on_continue(self, dialog_act, user_utterance):
+        """Moves on without waiting for the user."""
+        self.response = False
+
+    def on_slot(self, dialog_act, user_utterance):
+        """Fills the slot the current ask state is about, or asks for it again."""
+        category, confirmation, no_preference, ask_again = self.SLOT_RESPONSES[self.state]
+        self.extract_preferences(user_utterance, category)
+        if self.preferences[category]:
+            if self.preferences[category] == 'blank':
+                self.println(*no_preference)
             else:
-                self.println(f"Postal code: {self.restaurant['postcode']}. Thank you for using the system!",
-                             f"The postal code is {self.restaurant['postcode']}. Thank you for using the system!")
-                self.state = "goodbye"
+                self.println(*(text.format(self.preferences[category]) for text in confirmation))
+            self.redirection(category)
+        else:
+            self.println(*ask_again)
+
+    def on_requirements(self, dialog_act, user_utterance):
+        self.extract_additional_preferences(user_utterance)
+        self.response = False
+
+    def on_recommend(self, dialog_act, user_utterance):
+        self.make_recommendation()
+
+    def on_select_recommendation(self, dialog_act, user_utterance):
+        self.select_recommendation(user_utterance)
+
+    def on_memory_offer(self, dialog_act, user_utterance):
+        self.offer_memory_options(dialog_act)
+
+    def on_memory_select(self, dialog_act, user_utterance):
+        self.select_memory_option(user_utterance)
 
-    def next_state(self, user_utterance):
+    def on_changes(self, dialog_act, user_utterance):
+        """Walks through the preferences one by one, asking which to change."""
+        if dialog_act == "inform":
+            self.changes_counter -= 1
+        elif dialog_act == "negate":
+            self.println("Okay!", "Okay!")
+        else:
+            self.preferences[self.preferences_name[self.changes_counter]] = None
+        self.changes_counter += 1
+
+        if self.changes_counter == 3:
+            self.changes_counter = 0
+            self.response = False
+            self.state = "welcome"
+        else:
+            self.println(f"Change the {self.preferences_name[self.changes_counter]} of the restaurant? (Yes/No)",
+                         f"Do you want to change the {self.preferences_name[self.changes_counter]} of the restaurant? (Yes/No)")
+            self.state = "changes"
+
+    def on_phone(self, dialog_act, user_utterance):
+        self.println(f"Phone number: {self.restaurant['phone']}. Do you want the address?",
+                     f"The phone number is {self.restaurant['phone']}. Do you want the address?")
+
+    def on_address(self, dialog_act, user_utterance):
+        self.println(f"Adress: {self.restaurant['addr']}. Do you want the postal code?",
+                     f"The address is {self.restaurant['addr']}. Would you like the postal code?")
+
+    def on_postcode(self, dialog_act, user_utterance):
+        self.println(f"Postal code: {self.restaurant['postcode']}. Thank you for using the system!",
+                     f"The postal code is {self.restaurant['postcode']}. Thank you for using the system!")
+
+    def next_state(self, user_utterance, dialog_act=None):
         """Determines the next state based on the dialog act and user utterance."""
-        dialog_act = self.classify_dialog_act(user_utterance)
+        if dialog_act is None:
+            dialog_act = self.classify_dialog_act(user_utterance)
         self.handle_state(dialog_act, user_utterance)
 
+    def session_state(self):
+        """Returns a record of the state of the current conversation."""
+        state = SessionState.__new__(SessionState)
+        for field in SESSION_FIELDS:
+            setattr(state, field, getattr(self, field))
+        return state.copy()
+
+    def load_session(self, session_state):
+        for field in SESSION_FIELDS:
+            setattr(self, field, getattr(session_state, field))
+
+    def new_session(self, user_id=None):
+        return SessionState(self.user_id if user_id is None else user_id, self.preferences_name)
+
+    def start(self, session_state):
+        """Returns the state and responses after welcoming the user, without changing session_state."""
+        self.load_session(session_state.copy())
+        self.take_responses()
+        self.println(*self.get_response())
+        self.apply_memory()
+        return self.session_state(), self.take_responses()
+
+    def step(self, session_state, user_utterance, dialog_act=None):
+        """
+        Returns the state and responses after one user utterance, without changing session_state.
+        Performs no console I/O and no sleeps, dialog_act can be given to skip the classifier.
+        """
+        self.load_session(session_state.copy())
+        self.take_responses()
+        self.process_turn(user_utterance, dialog_act)
+        return self.session_state(), self.take_responses()
+
+    def process_turn(self, user_utterance, dialog_act=None):
+        """Handles a user utterance and the transitions that follow without waiting for the user."""
+        self.next_state(user_utterance, dialog_act)
+        while not self.response and self.state != "goodbye":
+            self.response = True
+            self.next_state("")
+
     def apply_memory(self):
-        # check if path of memory file exists and if memory is enabled
-        if self.memory and os.path.exists('../memory/memory.json'):
+        # check if there are remembered preferences and if memory is enabled
+        self.memory_options = self.memory_backend.last(3, self.user_id) if self.memory else []
+        if self.memory_options:
             self.print_single_ln("I see that you've used this system before. Would you like choose between you're previous options?")
-            user_input = input("You: ").lower()
-            if self.classify_dialog_act(user_input) == "affirm":
-                with open('../memory/memory.json', 'r') as f:
-                    memory = json.load(f)
-                    options = []
-                    # Get the last 3 entries
-                    last_three_items = list(memory.items())[-3:]
-
-                    for index, (key, value) in enumerate(last_three_items, start=1):
-                        options.append(str(index))
-                        self.format_memory_suggestions(index, value)
-
-                self.print_single_ln("With which option would you like to continue? (say none to proceed with new preferences)")
-                user_input = input("You: ").lower()
-                while user_input not in options and user_input != 'none':
-                    self.print_single_ln("Please select a valid option.")
-                    user_input = input("You: ").lower()
-                if user_input in options:
-                    chosen_option = last_three_items[int(user_input) - 1]  # Get the corresponding option
-                    self.preferences = chosen_option[1]["user_preferences"]
-                    self.print_single_ln(
-                        f"Got it! You've chosen option {user_input}. I'll be giving you recommendations based on your previous preferences.")
-                    self.state = "make_recommendation"
-                    self.make_recommendation()
-                    return
+            self.state = "memory_offer"
+
+    def offer_memory_options(self, dialog_act):
+        """Lists the last three remembered options when the user wants to use them."""
+        if dialog_act == "affirm":
+            # Get the last 3 entries
+            for index, value in enumerate(self.memory_options, start=1):
+                self.format_memory_suggestions(index, value)
 
+            self.print_single_ln("With which option would you like to continue? (say none to proceed with new preferences)")
+            self.state = "memory_select"
+        else:
             self.print_single_ln("Alright, let's start fresh. How can i help you?")
+            self.state = "welcome"
+
+    def select_memory_option(self, user_input):
+        """Continues with the remembered preferences of the chosen option."""
+        options = [str(index) for index in range(1, len(self.memory_options) + 1)]
+        if user_input in options:
+            chosen_option = self.memory_options[int(user_input) - 1]  # Get the corresponding option
+            self.preferences = chosen_option["user_preferences"]
+            self.print_single_ln(
+                f"Got it! You've chosen option {user_input}. I'll be giving you recommendations based on your previous preferences.")
+            self.state = "make_recommendation"
+            self.make_recommendation()
+        elif user_input == 'none':
+            self.print_single_ln("Alright, let's start fresh. How can i help you?")
+            self.state = "welcome"
+        else:
+            self.print_single_ln("Please select a valid option.")
 
     def format_memory_suggestions(self, index, user_preferences):
         memory_suggestion_template = f"{index}) {user_preferences['food_type']} food in the {user_preferences['area']} area in a {user_preferences['price_range']} price range."
@@ -417,16 +496,17 @@ class DialogManager:
         self.print_single_ln(memory_suggestion_template)
 
     def run(self):
-        """Runs the dialog system."""
+        """Runs the dialog system on the console."""
         # Welcome the user
-        self.println(*self.get_response())
-        self.apply_memory()
+        state, responses = self.start(self.new_session())
+        self.display(responses)
+        threading.Thread(target=self.warm_up, daemon=True).start()
 
-        while self.state != "goodbye":
-            if self.response:
-                user_input = input("You: ").lower()
-                self.next_state(user_input)
-            else:
-                user_input = ""
-                self.response = True
-                self.next_state(user_input)
+        while state.state != "goodbye":
+            user_input = input("You: ").lower()
+            state, responses = self.step(state, user_input)
+            self.display(responses)
+
+
+# Compiled once, checks that every state and handler in the table exists
+TRANSITION_TABLE = compile_transitions(TRANSITIONS, DialogManager)
@@ -0,0 +1,86 @@
+"""The inference rules of the dialog system, defined once and compiled into a columnar evaluator."""
+
+import numpy as np
+import pandas as pd
+
+# Antecedents are (column, value) pairs on restaurant_info.csv, all of them have to hold for the consequent to be set.
+# Rules are applied in order, so a later rule overrides an earlier one that sets the same property.
+RULES = {
+    1: {'antecedents': [('pricerange', 'cheap'), ('length_of_stay', 'short')], 'consequent': ('touristic', True), 'description': 'A cheap restaurant with good food attracts tourists'},
+    2: {'antecedents': [('food', 'romanian')], 'consequent': ('touristic', False), 'description': 'Romanian cuisine is unknown for most tourists and they prefer familiar food'},
+    3: {'antecedents': [('crowdedness', 'busy')], 'consequent': ('assigned_seats', True), 'description': 'In a busy restaurant the waiter decides where you sit'},
+    4: {'antecedents': [('length_of_stay', 'long')], 'consequent': ('suitable_for_children', False), 'description': 'Spending a long time is not advised when taking children'},
+    5: {'antecedents': [('crowdedness', 'busy')], 'consequent': ('romantic', False), 'description': 'A busy restaurant is not romantic'},
+    6: {'antecedents': [('length_of_stay', 'long')], 'consequent': ('romantic', True), 'description': 'Spending a long time in a restaurant is romantic'},
+}
+
+
+class InferenceRules:
+    """
+    Compiles a rule table once: the rules are put in dependency order, so a rule whose antecedent is the consequent
+    of another rule runs after it, and every distinct antecedent becomes one boolean mask that rules share.
+    """
+
+    def __init__(self, rules=RULES):
+        self.rules = rules
+        self.order = self.dependency_order(rules)
+
+    @staticmethod
+    def dependency_order(rules):
+        """Order the rules by id, but put every rule after the rules that produce the columns it reads."""
+        producers = {}
+        for rule_id, rule in rules.items():
+            producers.setdefault(rule['consequent'][0], []).append(rule_id)
+
+        order = []
+        visiting = set()
+
+        def visit(rule_id):
+            if rule_id in order:
+                return
+            if rule_id in visiting:
+                raise ValueError(f"Inference rule {rule_id} depends on itself")
+            visiting.add(rule_id)
+            for column, _ in rules[rule_id]['antecedents']:
+                for producer in producers.get(column, []):
+                    if producer != rule_id:
+                        visit(producer)
+            visiting.remove(rule_id)
+            order.append(rule_id)
+
+        for rule_id in sorted(rules):
+            visit(rule_id)
+        return order
+
+    @staticmethod
+    def matches(column, value):
+        """Boolean mask of the rows where column equals value, strings are compared case-insensitively."""
+        if isinstance(value, str):
+            return (column.astype(str).str.lower() == value.lower()).to_numpy()
+        return (column == value).to_numpy()
+
+    def apply(self, restaurants):
+        """Returns a copy of the restaurants with the inferred properties added, evaluated over all rows at once."""
+        restaurants = restaurants.copy()
+        masks = {}
+        inferred = set()
+
+        for rule_id in self.order:
+            rule = self.rules[rule_id]
+            mask = np.ones(len(restaurants), dtype=bool)
+            for column, value in rule['antecedents']:
+                # Antecedents on properties set by earlier rules have to see their current values
+                if (column, value) not in masks or column in inferred:
+                    masks[(column, value)] = self.matches(restaurants[column], value)
+                mask &= masks[(column, value)]
+
+            # A property column only exists when at least one restaurant got that property
+            key, consequent = rule['consequent']
+            if not mask.any():
+                continue
+            if key not in restaurants:
+                restaurants[key] = pd.Series(np.nan, index=restaurants.index, dtype=object)
+            restaurants.loc[mask, key] = consequent
+            inferred.add(key)
+
+        return restaurants
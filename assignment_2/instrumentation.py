@@ -0,0 +1,247 @@
+"""
+Opt-in timers and counters for the hot paths of the dialog system. Nothing is wrapped until instrument() is called,
+so the disabled cost is zero: the methods are the original functions. Observations go to pluggable sinks.
+
+Usage: python instrumentation.py [conversations] [prometheus file]
+"""
+
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# The instrumented methods as (module, class, method), the method name is the stage name
+HOT_PATHS = [
+    ('dialog_system', 'DialogManager', 'classify_dialog_act'),
+    ('algorithm', 'TextProcessor', 'categorize_words'),
+    ('algorithm', 'TextProcessor', 'apply_levenshtein'),
+    ('restaurant_selector', 'RestaurantSelector', 'filter_restaurants'),
+    ('restaurant_selector', 'RestaurantSelector', 'apply_inference_rules'),
+    ('restaurant_selector', 'RestaurantSelector', 'write_to_memory'),
+]
+
+# Upper bounds in seconds of the histogram buckets, the last one takes everything slower
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+           float('inf'))
+
+# The original functions of the wrapped methods, keyed by (class, method)
+ORIGINALS = {}
+
+
+class MetricsSink:
+    """Interface of the sinks, a stage duration is observed in seconds and a counter is incremented by a value."""
+
+    def observe(self, stage, seconds):
+        pass
+
+    def increment(self, name, value=1):
+        pass
+
+    def close(self):
+        pass
+
+
+class LogSink(MetricsSink):
+    """Logs every observation, at debug level by default."""
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger('dialog.metrics')
+        self.level = level
+
+    def observe(self, stage, seconds):
+        self.logger.log(self.level, "%s took %.3f ms", stage, seconds * 1000)
+
+    def increment(self, name, value=1):
+        self.logger.log(self.level, "%s += %s", name, value)
+
+
+class HistogramSink(MetricsSink):
+    """In-memory histogram per stage with fixed buckets, plus the sum, count and maximum, and the counters."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0,
+                                                      'max': 0.0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram['counts'][i] += 1
+                    break
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+            histogram['max'] = max(histogram['max'], seconds)
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def quantile(self, stage, q):
+        """Upper bound of the bucket that holds the q quantile of a stage, the maximum for the last bucket."""
+        histogram = self.histograms[stage]
+        rank = q * histogram['count']
+        seen = 0
+        for bound, count in zip(self.buckets, histogram['counts']):
+            seen += count
+            if seen >= rank:
+                return min(bound, histogram['max'])
+        return histogram['max']
+
+    def breakdown(self, total_stage=None):
+        """
+        Per-stage table of calls, total, mean, p50 and p99 (bucket bounds) and share of the time of total_stage,
+        or of all instrumented time when the stages do not nest
+        """
+        if total_stage in self.histograms:
+            total = self.histograms[total_stage]['sum']
+        else:
+            total = sum(histogram['sum'] for histogram in self.histograms.values())
+        total = total or 1.0
+        lines = [f"{'stage':<22} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'p50 ms <=':>10} {'p99 ms <=':>10} {'share':>7}"]
+        for stage, histogram in sorted(self.histograms.items(), key=lambda item: -item[1]['sum']):
+            lines.append(f"{stage:<22} {histogram['count']:>8,} {histogram['sum'] * 1000:>10.1f} "
+                         f"{histogram['sum'] / histogram['count'] * 1000:>9.3f} "
+                         f"{self.quantile(stage, 0.5) * 1000:>10.3f} {self.quantile(stage, 0.99) * 1000:>10.3f} "
+                         f"{histogram['sum'] / total:>7.1%}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value:,}")
+        return '\n'.join(lines)
+
+
+class PrometheusFileSink(HistogramSink):
+    """Histogram sink that writes the Prometheus text format to a file, on write() and on close."""
+
+    def __init__(self, path, buckets=BUCKETS):
+        super().__init__(buckets)
+        self.path = path
+
+    def render(self):
+        lines = ['# HELP dialog_stage_seconds Time spent in a hot path of the dialog system.',
+                 '# TYPE dialog_stage_seconds histogram']
+        with self.lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram['counts']):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'dialog_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'dialog_stage_seconds_sum{{stage="{stage}"}} {histogram["sum"]!r}')
+                lines.append(f'dialog_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+            if self.counters:
+                lines.append('# TYPE dialog_events_total counter')
+                for name, value in self.counters.items():
+                    lines.append(f'dialog_events_total{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        """Replaces the file in one step, so a scraper never reads half a dump."""
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            f.write(self.render())
+        os.replace(temporary_path, self.path)
+
+    def close(self):
+        self.write()
+
+
+class Metrics:
+    """Sends timings and counters to every sink."""
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+
+    def observe(self, stage, seconds):
+        for sink in self.sinks:
+            sink.observe(stage, seconds)
+
+    def increment(self, name, value=1):
+        for sink in self.sinks:
+            sink.increment(name, value)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def timed(metrics, stage, function):
+    """Wraps a function so every call is observed as the stage, and counts the calls that raise."""
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            metrics.increment(f"{stage}_errors")
+            raise
+        finally:
+            metrics.observe(stage, time.perf_counter() - start)
+
+    wrapper.__wrapped__ = function
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+
+def instrument(metrics, hot_paths=HOT_PATHS):
+    """Wraps the hot path methods of every instance with timers that report to metrics."""
+    for module_name, class_name, method in hot_paths:
+        cls = getattr(importlib.import_module(module_name), class_name)
+        key = (cls, method)
+        if key not in ORIGINALS:
+            ORIGINALS[key] = cls.__dict__[method]
+        function = ORIGINALS[key]
+        if isinstance(function, staticmethod):
+            setattr(cls, method, staticmethod(timed(metrics, method, function.__func__)))
+        else:
+            setattr(cls, method, timed(metrics, method, function))
+    return metrics
+
+
+def uninstrument():
+    """Puts the original methods back."""
+    for (cls, method), function in ORIGINALS.items():
+        setattr(cls, method, function)
+    ORIGINALS.clear()
+
+
+def main(conversations=300, prometheus_path=None):
+    from simulator import UserSimulator, load_utterances, simulate, simulation_dialog
+
+    sinks = [HistogramSink()]
+    if prometheus_path:
+        sinks.append(PrometheusFileSink(prometheus_path))
+    metrics = instrument(Metrics(*sinks), HOT_PATHS + [('dialog_system', 'DialogManager', 'step')])
+
+    dialog, memory_backend = simulation_dialog()
+    start = time.perf_counter()
+    simulate(dialog, UserSimulator(load_utterances()), int(conversations))
+    elapsed = time.perf_counter() - start
+    memory_backend.close()
+    metrics.close()
+    uninstrument()
+
+    print(f"Simulated {int(conversations):,} conversations in {elapsed:.2f}s")
+    print(sinks[0].breakdown(total_stage='step'))
+    if prometheus_path:
+        print(f"Wrote {prometheus_path}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
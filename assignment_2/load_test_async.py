@@ -0,0 +1,59 @@
+"""Load test: many concurrent conversations with a typing delay on a single event loop."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from algorithm import TextProcessor
+from async_dialog_system import AsyncDialogManager, ScriptedTransport
+from batch_classifier import MicroBatchClassifier
+from dialog_system import DialogManager, load_classifier
+from memory_store import MemoryLog, WriteBehindMemory
+from restaurant_selector import RestaurantSelector
+
+SCRIPT = ['cheap chinese food in the centre', 'no', 'no']
+
+
+async def run_conversations(conversations, response_delay, text_processor, restaurant_selector, classifier):
+    dialogs = [AsyncDialogManager(1, response_delay, "efficient", False, False,
+                                  text_processor=text_processor, restaurant_selector=restaurant_selector,
+                                  transport=ScriptedTransport(SCRIPT), classifier=classifier)
+               for _ in range(conversations)]
+    await asyncio.gather(*(dialog.run() for dialog in dialogs))
+    return dialogs
+
+
+def main(conversations=5000, response_delay=0.5):
+    conversations, response_delay = int(conversations), float(response_delay)
+
+    # Every conversation shares one text processor and restaurant selector, and the memory goes to a temporary file
+    memory_dir = tempfile.mkdtemp()
+    memory_backend = WriteBehindMemory(MemoryLog(os.path.join(memory_dir, 'memory.jsonl')))
+    text_processor = TextProcessor()
+    restaurant_selector = RestaurantSelector(memory_backend=memory_backend)
+    # The turns of the conversations are classified together
+    classifier = MicroBatchClassifier(DialogManager.classify_batch)
+    # Import scikit-learn and load the model before the clock starts, the first turn would pay for it otherwise
+    load_classifier()
+
+    start = time.perf_counter()
+    dialogs = asyncio.run(run_conversations(conversations, response_delay, text_processor, restaurant_selector,
+                                            classifier))
+    elapsed = time.perf_counter() - start
+    classifier.close()
+    memory_backend.close()
+
+    finished = sum(dialog.session.state == "goodbye" for dialog in dialogs)
+    responses = sum(len(dialog.transport.responses) for dialog in dialogs)
+    turns = finished * len(SCRIPT)
+    sequential = responses * response_delay
+    print(f"{finished}/{conversations} conversations finished in {elapsed:.2f}s on one event loop")
+    print(f"{turns / elapsed:,.0f} turns/sec, {responses / elapsed:,.0f} responses/sec")
+    print(f"one conversation at a time with blocking sleeps would take at least {sequential:,.0f}s")
+    print(f"classification: {classifier.classified} utterances in {classifier.batches} batches")
+    print(f"memory writes: {memory_backend.metrics()}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,421 @@
+"""Append-only storage for the preferences the dialog system remembers between sessions."""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl, appends are then only atomic within one process
+    fcntl = None
+
+OFFSET = struct.Struct('<Q')
+DEFAULT_USER = 'default'
+SCAN_BLOCK = 256  # Records read at once when MemoryLog.last scans the log backwards
+
+logger = logging.getLogger('dialog.memory')
+
+
+def default_memory_backend():
+    """The append-only log, moved over from the old memory.json format once, written from a background thread."""
+    memory_log = MemoryLog()
+    memory_log.migrate()
+    return WriteBehindMemory(memory_log)
+
+
+class MemoryBackend:
+    """Interface of the memory backends, every record is a dict and belongs to a user."""
+
+    def append(self, record, user_id=DEFAULT_USER):
+        self.append_many([record], user_id)
+
+    def append_many(self, records, user_id=DEFAULT_USER):
+        raise NotImplementedError
+
+    def last(self, n, user_id=DEFAULT_USER):
+        """Returns the last n records of the user, oldest first."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryLog(MemoryBackend):
+    """
+    Stores every remembered session as one JSON line in an append-only log. A side index file holds the byte offset
+    of every record as a fixed size integer, so the newest records are read from the end instead of loading the log.
+    Appends hold an exclusive file lock so concurrent processes never interleave records, and the log is compacted
+    to the newest max_records records every compact_every appends.
+    The log is shared by all users, the last records of a user are found by scanning it backwards from the end.
+    """
+
+    def __init__(self, path='../memory/memory.jsonl', max_records=1000, compact_every=100):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.lock_path = path + '.lock'
+        self.max_records = max_records
+        self.compact_every = compact_every
+        self.appends = 0
+
+    def lock(self):
+        """Open the lock file and take an exclusive lock, close the returned file to release it."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        lock_file = open(self.lock_path, 'a')
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def append_many(self, records, user_id=DEFAULT_USER):
+        """Append records to the log and their offsets to the index as one locked operation."""
+        if not records:
+            return
+        records = [{'user_id': user_id, **record} for record in records]
+        lines = [json.dumps(record).encode('utf-8') + b'\n' for record in records]
+        with self.lock():
+            self.check_index()
+            with open(self.path, 'ab') as log, open(self.index_path, 'ab') as index:
+                offset = log.seek(0, os.SEEK_END)
+                offsets = []
+                for line in lines:
+                    offsets.append(OFFSET.pack(offset))
+                    offset += len(line)
+                log.write(b''.join(lines))
+                log.flush()
+                os.fsync(log.fileno())
+                index.write(b''.join(offsets))
+
+            self.appends += len(records)
+            if self.appends >= self.compact_every:
+                self.appends = 0
+                if self.count() > self.max_records:
+                    self.rewrite(self.read_all()[-self.max_records:])
+
+    def count(self):
+        try:
+            return os.path.getsize(self.index_path) // OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    def last(self, n, user_id=DEFAULT_USER):
+        """
+        Returns the last n records of the user, oldest first. The log is read backwards in blocks of SCAN_BLOCK
+        records, found through the index, until n records of the user are found, all under the lock.
+        """
+        if n <= 0 or not os.path.exists(self.path):
+            return []
+        records = []
+        with self.lock():
+            self.check_index()
+            end = os.path.getsize(self.path)
+            block_end = self.count()
+            with open(self.index_path, 'rb') as index, open(self.path, 'rb') as log:
+                while block_end > 0 and len(records) < n:
+                    block_start = max(0, block_end - SCAN_BLOCK)
+                    index.seek(block_start * OFFSET.size)
+                    start = OFFSET.unpack(index.read(OFFSET.size))[0]
+                    log.seek(start)
+                    block = [json.loads(line) for line in log.read(end - start).splitlines() if line.strip()]
+                    # Records of the old memory.json have no user, they were all made by the default user
+                    records[:0] = [record for record in block if record.get('user_id', DEFAULT_USER) == user_id]
+                    end = start
+                    block_end = block_start
+        return records[-n:]
+
+    def read_all(self):
+        records = []
+        try:
+            with open(self.path, 'rb') as log:
+                for line in log:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # A line cut off by a crash during an append
+        except FileNotFoundError:
+            pass
+        return records
+
+    def check_index(self):
+        """Rebuild the index when it does not cover the whole log, e.g. after a crash between the two writes."""
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        count = self.count()
+        if count:
+            with open(self.index_path, 'rb') as index:
+                index.seek((count - 1) * OFFSET.size)
+                last_offset = OFFSET.unpack(index.read(OFFSET.size))[0]
+            with open(self.path, 'rb') as log:
+                log.seek(last_offset)
+                last_line = log.readline()
+            if last_line.endswith(b'\n') and last_offset + len(last_line) == log_size:
+                return
+        elif log_size == 0:
+            return
+        self.rewrite(self.read_all())
+
+    def rewrite(self, records):
+        """
+        Replace the log and index with the given records, through temporary files so readers never see half.
+        Called with the lock held, the temporary files have unique names all the same.
+        """
+        offsets = []
+        offset = 0
+        directory = os.path.dirname(self.path) or '.'
+        log_fd, log_tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        index_fd, index_tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(log_fd, 'wb') as log:
+                for record in records:
+                    line = json.dumps(record).encode('utf-8') + b'\n'
+                    offsets.append(OFFSET.pack(offset))
+                    offset += len(line)
+                    log.write(line)
+            with os.fdopen(index_fd, 'wb') as index:
+                index.write(b''.join(offsets))
+            os.replace(log_tmp, self.path)
+            os.replace(index_tmp, self.index_path)
+        finally:
+            for tmp_path in (log_tmp, index_tmp):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def migrate(self, json_path='../memory/memory.json'):
+        """
+        Move the records of the old memory.json ({timestamp: record}) into the log, once. The check, the read and
+        the rename all happen under the lock, so processes starting together import the records only once.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        with self.lock():
+            # Another process may have moved it in the meantime
+            if not os.path.exists(json_path):
+                return 0
+            with open(json_path, 'r') as f:
+                try:
+                    memory = json.load(f)
+                except json.JSONDecodeError:
+                    memory = {}
+
+            records = [{'timestamp': timestamp, **record} for timestamp, record in memory.items()]
+            self.rewrite(records + self.read_all())
+            os.replace(json_path, json_path + '.migrated')
+        return len(records)
+
+
+class SQLiteMemory(MemoryBackend):
+    """
+    Embedded SQLite backend keyed by user. The table is indexed on (user_id, timestamp) so the last records of a
+    user are an index range scan, WAL mode lets readers work while another session writes, and a small pool of
+    connections is shared by the threads of a process.
+    """
+
+    def __init__(self, path='../memory/memory.db', pool_size=4):
+        self.path = path
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.connections = []
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        for _ in range(pool_size):
+            self.pool.put(self.connect())
+
+        with self.connection() as connection:
+            connection.execute("""CREATE TABLE IF NOT EXISTS memory (
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    user_id TEXT NOT NULL,
+                                    timestamp TEXT NOT NULL,
+                                    record TEXT NOT NULL)""")
+            connection.execute("CREATE INDEX IF NOT EXISTS memory_user_timestamp ON memory (user_id, timestamp)")
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self.connections.append(connection)
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool, waits when all of them are in use."""
+        connection = self.pool.get()
+        try:
+            yield connection
+        finally:
+            self.pool.put(connection)
+
+    def append_many(self, records, user_id=DEFAULT_USER):
+        """Insert all records in a single transaction."""
+        rows = [(user_id, record.get('timestamp') or str(datetime.now()), json.dumps(record)) for record in records]
+        if not rows:
+            return
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany("INSERT INTO memory (user_id, timestamp, record) VALUES (?, ?, ?)", rows)
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def last(self, n, user_id=DEFAULT_USER):
+        with self.connection() as connection:
+            rows = connection.execute("SELECT record FROM memory WHERE user_id = ? ORDER BY timestamp DESC, id DESC "
+                                      "LIMIT ?", (user_id, n)).fetchall()
+        return [json.loads(record) for record, in reversed(rows)]
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+        self.connections = []
+
+
+class WriteBehindMemory(MemoryBackend):
+    """
+    Buffers appended records in a bounded queue and writes them to another backend in batches from a background
+    thread, so a recommendation never waits on the disk. When the queue is full an append blocks until the writer
+    catches up, and everything still queued is written when the process exits. A batch the backend fails to write
+    is tried again retries times before it is logged and dropped.
+    """
+
+    def __init__(self, backend, max_queue_size=1000, batch_size=100, flush_interval=0.05, flush_timeout=5.0,
+                 retries=3):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flush_timeout = flush_timeout
+        self.retries = retries
+        self.records = queue.Queue(maxsize=max_queue_size)
+        self.closed = False
+
+        # Metrics
+        self.max_depth = 0
+        self.flushes = 0
+        self.flushed_records = 0
+        self.last_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.errors = 0
+        self.dropped_records = 0
+
+        self.writer = threading.Thread(target=self.write_records, daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def append_many(self, records, user_id=DEFAULT_USER):
+        if self.closed:
+            raise RuntimeError("Cannot append to a closed memory backend")
+        if not self.writer.is_alive():
+            raise RuntimeError("The memory writer thread has stopped")
+        for record in records:
+            # Copy the record, the dialog keeps changing its preferences dict after the recommendation
+            self.records.put((user_id, copy.deepcopy(record)))
+        self.max_depth = max(self.max_depth, self.records.qsize())
+
+    def collect_batch(self):
+        """Wait for a first record, then keep collecting until the batch is full or flush_interval has passed."""
+        batch = [self.records.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1] is not None and len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.records.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def write_records(self):
+        while True:
+            batch = self.collect_batch()
+            stop = batch[-1] is None
+            records = [item for item in batch if item is not None]
+
+            # Write the records of every user with a single append_many
+            per_user = {}
+            for user_id, record in records:
+                per_user.setdefault(user_id, []).append(record)
+
+            start = time.perf_counter()
+            for user_id, user_records in per_user.items():
+                self.write_batch(user_records, user_id)
+            if records:
+                self.record_flush(len(records), time.perf_counter() - start)
+
+            for _ in batch:
+                self.records.task_done()
+            if stop:
+                return
+
+    def write_batch(self, records, user_id):
+        """Write the records of one user, trying again with a growing pause when the backend fails."""
+        for attempt in range(self.retries + 1):
+            try:
+                self.backend.append_many(records, user_id)
+                return
+            except Exception:
+                self.errors += 1
+                if attempt == self.retries:
+                    self.dropped_records += len(records)
+                    logger.exception("Dropped %d remembered records of user %r after %d attempts",
+                                     len(records), user_id, attempt + 1)
+                else:
+                    time.sleep(0.1 * 2 ** attempt)
+
+    def record_flush(self, count, seconds):
+        self.flushes += 1
+        self.flushed_records += count
+        self.last_flush_latency = seconds
+        self.total_flush_latency += seconds
+        self.max_flush_latency = max(self.max_flush_latency, seconds)
+
+    def flush(self, timeout=None):
+        """
+        Block until every record appended so far has been written, at most timeout seconds (flush_timeout by
+        default). Returns False when that did not happen in time or the writer thread has stopped.
+        """
+        deadline = time.monotonic() + (self.flush_timeout if timeout is None else timeout)
+        with self.records.all_tasks_done:
+            while self.records.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.writer.is_alive():
+                    return False
+                # Wake up now and then to notice a writer that died
+                self.records.all_tasks_done.wait(min(remaining, 0.5))
+        return True
+
+    def last(self, n, user_id=DEFAULT_USER):
+        """Blocks on the writer, call it from a worker thread (run_in_executor) in asyncio code."""
+        if not self.flush():
+            logger.warning("Reading remembered records while %d are still unwritten", self.records.unfinished_tasks)
+        return self.backend.last(n, user_id)
+
+    def metrics(self):
+        return {
+            'queue_depth': self.records.qsize(),
+            'max_queue_depth': self.max_depth,
+            'flushes': self.flushes,
+            'flushed_records': self.flushed_records,
+            'last_flush_latency': self.last_flush_latency,
+            'mean_flush_latency': self.total_flush_latency / self.flushes if self.flushes else 0.0,
+            'max_flush_latency': self.max_flush_latency,
+            'errors': self.errors,
+            'dropped_records': self.dropped_records,
+        }
+
+    def close(self):
+        """Write everything that is still queued, then stop the writer and close the backend."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer.is_alive():
+            self.records.put(None)
+            self.writer.join()
+        self.backend.close()
+        atexit.unregister(self.close)
@@ -0,0 +1,49 @@
+import re
+import numpy as np
+import pandas as pd
+
+
+class RestaurantIndex:
+    """
+    In-memory index over the restaurant table. The filter columns are normalized and dictionary encoded into
+    integer codes once, with a bitset of matching rows per distinct value, so a (food, price, area) query is
+    an intersection of a few bitsets instead of a string scan over every row.
+    """
+
+    def __init__(self, restaurants_df, columns=('food', 'pricerange', 'area')):
+        self.size = len(restaurants_df)
+        self.values = {}  # column -> distinct normalized values, position is the code
+        self.codes = {}  # column -> code of every row
+        self.postings = {}  # column -> {value: packed bitset of the rows with that value}
+        self.all_rows = np.packbits(np.ones(self.size, dtype=bool))
+        self.no_rows = np.zeros_like(self.all_rows)
+
+        for column in columns:
+            # Missing values become '', which no query matches, like na=False did
+            normalized = restaurants_df[column].fillna('').astype(str).str.strip().str.lower()
+            codes, values = pd.factorize(normalized)
+            self.values[column] = [str(value) for value in values]
+            self.codes[column] = codes.astype(np.int32)
+            self.postings[column] = {value: np.packbits(codes == code) for code, value in enumerate(self.values[column])}
+
+    def posting(self, column, value, substring=False):
+        """Bitset of the rows where column equals value, or contains it as a case-insensitive pattern."""
+        value = value.strip().lower()
+        if not substring:
+            return self.postings[column].get(value, self.no_rows)
+
+        # Substring mode matches the pattern against the distinct values only, then unions their bitsets
+        pattern = re.compile(value, re.IGNORECASE)
+        bits = self.no_rows
+        for candidate, posting in self.postings[column].items():
+            if candidate and pattern.search(candidate):
+                bits = bits | posting
+        return bits
+
+    def select(self, substring=False, **filters):
+        """Returns the positions of the rows matching every given column=value filter, in table order."""
+        bits = self.all_rows
+        for column, value in filters.items():
+            if value and value.lower() != 'blank':
+                bits = bits & self.posting(column, value, substring)
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
@@ -1,98 +1,128 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
 import pandas as pd
 from datetime import datetime
-import json
+from inference_rules import RULES, InferenceRules
+from memory_store import DEFAULT_USER, default_memory_backend
+from restaurant_index import RestaurantIndex
+
+# Bump this whenever the layout of the restaurant snapshot changes
+SNAPSHOT_VERSION = 1
+
 
 class RestaurantSelector:
-    def __init__(self, csv_path='../data/restaurant_info.csv'):
-        self.restaurants_df = pd.read_csv(csv_path)
+    def __init__(self, csv_path='../data/restaurant_info.csv', substring_match=False, memory_backend=None,
+                 snapshot_dir='../models'):
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self.inference_rules = InferenceRules()
+        # The inference rules only read restaurant columns, so the inferred properties are computed once, together
+        # with the index, and kept in a binary snapshot next to the models that is reused while the csv is unchanged
+        if not self.load_snapshot():
+            self.restaurants_df = self.apply_inference_rules(pd.read_csv(csv_path))
+            self.restaurant_index = RestaurantIndex(self.restaurants_df)
+            self.save_snapshot()
+        # Exact matching on the normalized values by default, substring_match keeps the old str.contains behaviour
+        self.substring_match = substring_match
+        # Remembered preferences, by default an append-only log written from a background thread
+        # so recommendations never wait on the disk
+        self.memory_backend = memory_backend if memory_backend is not None else default_memory_backend()
+
+    def snapshot_hash(self):
+        """Hash the csv and the inference rules, so a snapshot is only reused when neither changed."""
+        digest = hashlib.sha256()
+        with open(self.csv_path, 'rb') as f:
+            digest.update(f.read())
+        # A snapshot pickled by another pandas version may not load, so it is rebuilt instead
+        settings = {'version': SNAPSHOT_VERSION, 'rules': RULES, 'pandas': pd.__version__}
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def snapshot_path(self, snapshot_hash):
+        return os.path.join(self.snapshot_dir, f"restaurants_v{SNAPSHOT_VERSION}_{snapshot_hash[:16]}.pkl")
+
+    def load_snapshot(self):
+        """Load the table and index from the snapshot, returns False if there is none for the current csv and rules."""
+        snapshot_hash = self.snapshot_hash()
+        try:
+            with open(self.snapshot_path(snapshot_hash), 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception:
+            # Missing, truncated or written by incompatible library versions, all of them mean the snapshot is stale
+            return False
+
+        if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('hash') != snapshot_hash:
+            return False
+
+        self.restaurants_df = snapshot['restaurants_df']
+        self.restaurant_index = snapshot['restaurant_index']
+        return True
+
+    def save_snapshot(self):
+        """Write the table with the inferred properties and its index to disk, skipped when that is not possible."""
+        snapshot_hash = self.snapshot_hash()
+        snapshot = {'version': SNAPSHOT_VERSION, 'hash': snapshot_hash, 'restaurants_df': self.restaurants_df,
+                    'restaurant_index': self.restaurant_index}
+        path = self.snapshot_path(snapshot_hash)
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            # Write to a temporary file of its own first, so a crash never leaves a half written snapshot behind and
+            # two processes saving at once never replace each other's file
+            fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
 
     def filter_restaurants(self, food_type=None, price_range=None, area=None):
         """Apply dataframe filters based on user preferences"""
-        filtered_df = self.restaurants_df
-
-        if food_type and food_type.lower() != 'blank':
-            filtered_df = filtered_df[filtered_df['food'].str.contains(food_type, case=False, na=False)]
-
-        if price_range and price_range.lower() != 'blank':
-            filtered_df = filtered_df[filtered_df['pricerange'].str.contains(price_range, case=False, na=False)]
-
-        if area and area.lower() != 'blank':
-            filtered_df = filtered_df[filtered_df['area'].str.contains(area, case=False, na=False)]
-
-        return filtered_df
-
-    def apply_inference_rules(self, restaurant, user_preferences):
-        """Apply inference rules to deduce properties of the restaurant based on user preferences"""
-        # Dynamically determine which rules to apply based on user preferences
-        properties = {}
-        # Rule 1: Cheap and good food attracts tourists
-        if user_preferences.get('price_range') == 'cheap' and restaurant['length_of_stay'] == 'short':
-            properties['touristic'] = True
-        # Rule 2: Romanian cuisine is not typically touristic
-        if restaurant['food'] == 'Romanian':
-            properties['touristic'] = False
-        # Rule 3: Busy places have assigned seats
-        if restaurant['crowdedness'] == 'busy':
-            properties['assigned_seats'] = True
-        # Rule 4: Not suitable for children if stay is long
-        if restaurant['length_of_stay'] == 'long':
-            properties['suitable_for_children'] = False
-        # Rule 5 & 6: Romantic settings
-        if restaurant['crowdedness'] == 'busy':
-            properties['romantic'] = False
-        if restaurant['length_of_stay'] == 'long':
-            properties['romantic'] = True
-
-        # Update restaurant info based on properties deduced from rules
-        for key, value in properties.items():
-            restaurant[key] = value
-
-        return restaurant
-
-    def recommend_restaurant(self, food_type=None, price_range=None, area=None, user_preferences=None):
+        rows = self.restaurant_index.select(self.substring_match, food=food_type, pricerange=price_range, area=area)
+        return self.restaurants_df.iloc[rows]
+
+    def apply_inference_rules(self, restaurants, user_preferences=None):
+        """Apply inference rules to deduce properties of all given restaurants at once"""
+        return self.inference_rules.apply(restaurants)
+
+    def recommend_restaurant(self, food_type=None, price_range=None, area=None, user_preferences=None,
+                             user_id=DEFAULT_USER, notify=None):
         """Recommend a restaurant out of the csv based on user preferences"""
 
         # Initial filtering based on directly available columns
         filtered_restaurants = self.filter_restaurants(food_type, price_range, area)
 
-        # Apply inference rules to each restaurant based on user preferences
-        filtered_restaurants = filtered_restaurants.apply(lambda x: self.apply_inference_rules(x, user_preferences),
-                                                          axis=1)
-
         # Read and append and preferences into the memory json file
-        self.write_to_memory(food_type, price_range, area, user_preferences)
+        self.write_to_memory(food_type, price_range, area, user_preferences, user_id)
 
         # Further filtering based on specific user preferences for properties
         for preference in ['romantic', 'children', 'touristic', 'assigned_seats']:
             if user_preferences.get(preference):
-                if len(filtered_restaurants.get(preference, [])):
+                if preference in filtered_restaurants and filtered_restaurants[preference].notna().any():
                     filtered_restaurants = filtered_restaurants[
                         filtered_restaurants[preference] == user_preferences[preference]]
                 else:
-                    print(f"System: Sorry, no restaurant matches your additional preference for '{preference}', so it won't be taken into account.")
+                    message = f"Sorry, no restaurant matches your additional preference for '{preference}', so it won't be taken into account."
+                    if notify:
+                        notify(message)
+                    else:
+                        print(f"System: {message}")
 
         if filtered_restaurants.empty:
             return "System: Sorry, no restaurant matches your preferences."
 
         return filtered_restaurants
 
-    @staticmethod
-    def write_to_memory(food_type, price_range, area, user_preferences):
-        try:
-            with open('../memory/memory.json', 'r') as f:
-                memory = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            memory = {}
-
-        body = {str(datetime.now()): {
+    def write_to_memory(self, food_type, price_range, area, user_preferences, user_id=DEFAULT_USER):
+        self.memory_backend.append({
+            "timestamp": str(datetime.now()),
             "food_type": food_type,
             "price_range": price_range,
             "area": area,
             "user_preferences": user_preferences
-        }}
-
-        memory.update(body)
-
-        # Write the updated memory back to the file, creating it if necessary
-        with open('../memory/memory.json', 'w') as f:
-            json.dump(memory, f, indent=4)
+        }, user_id)
@@ -0,0 +1,182 @@
+"""
+Dialog simulator: drives DialogManager with simulated users or replays dialog_acts.dat, without delays,
+and reports turn latency percentiles, turns/sec and where the time of a turn goes.
+
+Usage: python simulator.py [simulate|replay] [conversations or utterances] [seed]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import numpy as np
+from assignment_1a.data_processing import open_dataset
+from dialog_system import DialogManager
+from memory_store import MemoryLog, WriteBehindMemory
+from restaurant_selector import RestaurantSelector
+
+# What a simulated user answers in each state, as (dialog act, weight). 'choice' answers with a recommendation number.
+USER_POLICY = {
+    'welcome': [('inform', 70), ('hello', 15), ('null', 10), ('bye', 5)],
+    'ask_location': [('inform', 90), ('null', 8), ('bye', 2)],
+    'ask_food_type': [('inform', 90), ('null', 8), ('bye', 2)],
+    'ask_price_range': [('inform', 90), ('null', 8), ('bye', 2)],
+    'ask_specific_requirements': [('negate', 50), ('inform', 30), ('affirm', 20)],
+    'select_recommendation': [('choice', 90), ('null', 10)],
+    'no_match': [('affirm', 60), ('negate', 40)],
+    'changes': [('affirm', 40), ('negate', 40), ('inform', 20)],
+    'request_further_details': [('affirm', 70), ('negate', 30)],
+    'provide_address': [('affirm', 70), ('negate', 30)],
+    'provide_postalcode': [('affirm', 70), ('negate', 30)],
+    'memory_offer': [('negate', 100)],
+}
+
+# The stages a turn is split into, as (stage, object attribute of the dialog or None, method names)
+STAGES = [
+    ('classification', None, ['classify_dialog_act']),
+    ('slot extraction', 'text_processor', ['categorize_words']),
+    ('restaurant filtering', 'restaurant_selector', ['filter_restaurants']),
+    ('memory write', 'restaurant_selector', ['write_to_memory']),
+    ('response formatting', None, ['println', 'print_single_ln']),
+]
+
+
+def load_utterances(filepath='../data/dialog_acts.dat'):
+    """Returns the (dialog act, utterance) pairs of the dataset in file order, from the shared dataset cache."""
+    return open_dataset(filepath).labeled_lines()
+
+
+class UserSimulator:
+    """Answers every system state with a dialog act from USER_POLICY and a dataset utterance of that act."""
+
+    def __init__(self, pairs, policy=USER_POLICY, max_choice=3, seed=0):
+        self.utterances = defaultdict(list)
+        for dialog_act, utterance in pairs:
+            self.utterances[dialog_act].append(utterance)
+        self.policy = policy
+        self.max_choice = max_choice
+        self.random = random.Random(seed)
+        self.any_act = sorted(self.utterances)
+
+    def respond(self, state):
+        """Returns the (intended dialog act, utterance) of the user in a state."""
+        if state in self.policy:
+            acts, weights = zip(*self.policy[state])
+            dialog_act = self.random.choices(acts, weights)[0]
+        else:
+            dialog_act = self.random.choice(self.any_act)
+        if dialog_act == 'choice':
+            return dialog_act, str(self.random.randint(1, self.max_choice))
+        return dialog_act, self.random.choice(self.utterances[dialog_act])
+
+
+class StageTimer:
+    """Times every call of the stage methods of one dialog and the turns around them."""
+
+    def __init__(self, dialog, stages=STAGES):
+        self.calls = defaultdict(list)
+        self.turns = []
+        for stage, owner, methods in stages:
+            target = dialog if owner is None else getattr(dialog, owner)
+            for method in methods:
+                setattr(target, method, self.timed(stage, getattr(target, method)))
+
+    def timed(self, stage, method):
+        calls = self.calls[stage]
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                calls.append(time.perf_counter() - start)
+        return wrapper
+
+    def turn(self, step, *args):
+        """Calls step(*args) and records how long the turn took."""
+        start = time.perf_counter()
+        result = step(*args)
+        self.turns.append(time.perf_counter() - start)
+        return result
+
+    def report(self, elapsed):
+        """Prints the turn latency percentiles, turns/sec and the per-stage breakdown."""
+        turns = np.array(self.turns)
+        total = turns.sum()
+        print(f"{len(turns):,} turns in {elapsed:.2f}s, {len(turns) / elapsed:,.0f} turns/sec")
+        print(f"{'stage':<22} {'calls':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'share':>7}")
+        rows = [(stage, np.array(calls)) for stage, calls in self.calls.items()]
+        rows.append(('turn', turns))
+        for stage, calls in rows:
+            if not len(calls):
+                print(f"{stage:<22} {0:>8}")
+                continue
+            p50, p95, p99 = np.percentile(calls, [50, 95, 99]) * 1000
+            print(f"{stage:<22} {len(calls):>8,} {p50:>9.3f} {p95:>9.3f} {p99:>9.3f} {calls.sum() / total:>7.1%}")
+
+
+def simulation_dialog(amount_of_recommendations=3):
+    """A dialog without delays whose memory goes to a temporary file, with the write-behind log used by default."""
+    memory_dir = tempfile.mkdtemp()
+    memory_backend = WriteBehindMemory(MemoryLog(os.path.join(memory_dir, 'memory.jsonl')))
+    dialog = DialogManager(amount_of_recommendations, 0, "efficient", False, False,
+                           restaurant_selector=RestaurantSelector(memory_backend=memory_backend))
+    return dialog, memory_backend
+
+
+def simulate(dialog, user, conversations=1000, max_turns=20, timer=None):
+    """Runs conversations with a simulated user until goodbye or max_turns, returns how many said goodbye."""
+    step = dialog.step if timer is None else lambda *args: timer.turn(dialog.step, *args)
+    finished = 0
+    for _ in range(conversations):
+        state, _ = dialog.start(dialog.new_session())
+        for _ in range(max_turns):
+            if state.state == "goodbye":
+                break
+            _, utterance = user.respond(state.state)
+            state, _ = step(state, utterance)
+        finished += state.state == "goodbye"
+    return finished
+
+
+def replay(dialog, pairs, max_turns=20, timer=None):
+    """Feeds the dataset utterances in order, a new conversation starts at goodbye or after max_turns."""
+    step = dialog.step if timer is None else lambda *args: timer.turn(dialog.step, *args)
+    conversations = 0
+    state, turns = None, max_turns
+    for _, utterance in pairs:
+        if turns >= max_turns or state.state == "goodbye":
+            state, _ = dialog.start(dialog.new_session())
+            conversations += 1
+            turns = 0
+        state, _ = step(state, utterance)
+        turns += 1
+    return conversations
+
+
+def main(mode='simulate', count=None, seed=0):
+    seed = int(seed)
+    pairs = load_utterances()
+
+    dialog, memory_backend = simulation_dialog()
+    timer = StageTimer(dialog)
+    np.random.seed(seed)  # The recommendations are sampled
+
+    start = time.perf_counter()
+    if mode == 'replay':
+        replayed = pairs if count is None else pairs[:int(count)]
+        conversations = replay(dialog, replayed, timer=timer)
+        print(f"Replayed {len(replayed):,} utterances of dialog_acts.dat as {conversations:,} conversations")
+    else:
+        conversations = 1000 if count is None else int(count)
+        finished = simulate(dialog, UserSimulator(pairs, seed=seed), conversations, timer=timer)
+        print(f"Simulated {conversations:,} conversations, {finished:,} ended with goodbye")
+    elapsed = time.perf_counter() - start
+    memory_backend.close()
+    timer.report(elapsed)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
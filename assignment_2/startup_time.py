@@ -0,0 +1,73 @@
+"""
+Measure the startup of the dialog system: wall time from starting the interpreter to the first input prompt,
+and the slowest imports on the way there according to python -X importtime.
+
+Usage: python startup_time.py [runs]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+BUDGET = 0.3  # seconds to the first prompt
+
+# main.py without the typing delay, the process is stopped once it waits for the first user input
+STARTUP = ("from dialog_system import DialogManager\n"
+           "DialogManager(3, 0, 'conversational', True, True).run()\n")
+
+
+def environment():
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, '.', env.get('PYTHONPATH')]))
+    return env
+
+
+def time_to_first_prompt(extra_args=()):
+    """Seconds until the process prints the 'You: ' prompt, and what it wrote to stderr."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *extra_args, '-c', STARTUP], stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=environment())
+    output = b''
+    while not output.endswith(b'You: '):
+        chunk = process.stdout.read1(4096)
+        if not chunk:
+            raise RuntimeError(f"The dialog system stopped before the first prompt: {process.stderr.read().decode()}")
+        output += chunk
+    elapsed = time.perf_counter() - start
+    process.kill()
+    _, stderr = process.communicate()
+    return elapsed, stderr.decode()
+
+
+def slowest_imports(importtime_output, top=15):
+    """Returns the (cumulative us, self us, module) lines of -X importtime with the largest cumulative time."""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative_us), int(self_us), module.rstrip()))
+    total = sum(self_us for _, self_us, _ in imports)
+    return total, sorted(imports, reverse=True)[:top]
+
+
+def main(runs=5):
+    # The first run may build the restaurant snapshot and the model bundle, only warm starts are timed
+    time_to_first_prompt()
+    timings = sorted(time_to_first_prompt()[0] for _ in range(int(runs)))
+    median = timings[len(timings) // 2]
+    print(f"Time to first prompt: median {median * 1000:.0f} ms, best {timings[0] * 1000:.0f} ms "
+          f"over {runs} runs (budget {BUDGET * 1000:.0f} ms: {'ok' if median <= BUDGET else 'over'})")
+
+    _, importtime_output = time_to_first_prompt(['-X', 'importtime'])
+    total, imports = slowest_imports(importtime_output)
+    print(f"\nImports before the first prompt: {total / 1000:.0f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative_us, self_us, module in imports:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
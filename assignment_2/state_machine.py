@@ -0,0 +1,225 @@
+"""The state transitions of the dialog system, defined once as a table and compiled into per-state dispatch dicts."""
+
+from collections import deque
+
+ANY = '*'
+GOODBYE = "goodbye"
+
+# state -> dialog act(s) -> (handler, text, next state)
+# The handler is the name of a DialogManager method called with (dialog_act, user_utterance), the text is an
+# (efficient, conversational) pair that is said before it. The next state is set after the handler, None keeps the
+# state and a tuple lists the states the handler itself can move to. ANY is the entry for every other dialog act.
+TRANSITIONS = {
+    'welcome': {
+        'hello': (None, ("Please provide a location. (centre, north, south, east, west)",
+                         "Where would you like to find a restaurant? (centre, north, south, east, west)"), 'ask_location'),
+        'inform': ('on_preferences', None, ('ask_location', 'ask_food_type', 'ask_price_range',
+                                            'ask_specific_requirements', 'make_recommendation')),
+        'restart': ('on_restart', None, ('welcome',)),
+        ('bye', 'negate'): ('on_goodbye', None, (GOODBYE,)),
+        ANY: (None, ("Sorry, didn't understand.",
+                     "Hmm, I didn’t quite catch that. Could you tell me your preferences again?"), None),
+    },
+    'ask_location': {
+        'inform': ('on_slot', None, ('ask_location', 'ask_food_type', 'ask_price_range',
+                                     'ask_specific_requirements', 'make_recommendation')),
+        ('bye', 'negate'): ('on_goodbye', None, (GOODBYE,)),
+    },
+    'ask_food_type': {
+        'inform': ('on_slot', None, ('ask_location', 'ask_food_type', 'ask_price_range',
+                                     'ask_specific_requirements', 'make_recommendation')),
+        ('bye', 'negate'): ('on_goodbye', None, (GOODBYE,)),
+    },
+    'ask_price_range': {
+        'inform': ('on_slot', None, ('ask_location', 'ask_food_type', 'ask_price_range',
+                                     'ask_specific_requirements', 'make_recommendation')),
+        ('bye', 'negate'): ('on_goodbye', None, (GOODBYE,)),
+    },
+    'ask_specific_requirements': {
+        'negate': ('on_continue', None, 'make_recommendation'),
+        'affirm': (None, ("Any specific requirements like a romantic setting or a place suitable for children?",
+                          "Please specify if you need a romantic setting, touristic restaurant, assigned seats or a place suitable for children."), None),
+        ANY: ('on_requirements', None, 'make_recommendation'),
+    },
+    'make_recommendation': {
+        ANY: ('on_recommend', None, ('request_further_details', 'select_recommendation', 'no_match')),
+    },
+    'select_recommendation': {
+        ANY: ('on_select_recommendation', None, ('select_recommendation', 'request_further_details')),
+    },
+    'memory_offer': {
+        ANY: ('on_memory_offer', None, ('memory_select', 'welcome')),
+    },
+    'memory_select': {
+        ANY: ('on_memory_select', None, ('memory_select', 'request_further_details', 'select_recommendation',
+                                         'no_match', 'welcome')),
+    },
+    'no_match': {
+        'negate': (None, ("Sorry, Goodbye!", "Sorry, have a great day! Goodbye."), GOODBYE),
+        ANY: ('on_continue', None, 'changes'),
+    },
+    'changes': {
+        ANY: ('on_changes', None, ('changes', 'welcome')),
+    },
+    'request_further_details': {
+        'negate': (None, ("Okay, Goodbye!", "Okay, have a great day! Goodbye."), GOODBYE),
+        'restart': ('on_restart', None, ('welcome',)),
+        'reqalts': ('on_continue', None, 'make_recommendation'),
+        ANY: ('on_phone', None, 'provide_address'),
+    },
+    'provide_address': {
+        'negate': (None, ("Alright Goodbye!", "Alright. Thank you, goodbye!"), GOODBYE),
+        ANY: ('on_address', None, 'provide_postalcode'),
+    },
+    'provide_postalcode': {
+        'negate': (None, ("Okay, Goodbye!", "Okay, have a nice day!"), GOODBYE),
+        ANY: ('on_postcode', None, GOODBYE),
+    },
+    GOODBYE: {},
+}
+
+# Where a conversation can begin, memory_offer is entered by DialogManager.start when there are remembered options
+ENTRY_STATES = ('welcome', 'memory_offer')
+
+# The numbered system states of state_transition_diagram.png and the edges between them
+DIAGRAM_STATES = {
+    1: 'welcome',
+    2: 'ask_location',
+    3: 'ask_food_type',
+    4: 'ask_price_range',
+    5: 'no_match',
+    6: 'changes',
+    7: 'ask_specific_requirements',
+    8: 'make_recommendation',
+    9: 'select_recommendation',
+    10: 'request_further_details',
+    11: 'provide_address',
+    12: 'provide_postalcode',
+    13: GOODBYE,
+}
+DIAGRAM_EDGES = [
+    ('welcome', 'ask_location'),
+    ('ask_location', 'ask_location'),
+    ('ask_location', 'ask_food_type'),
+    ('ask_food_type', 'ask_food_type'),
+    ('ask_food_type', 'ask_price_range'),
+    ('ask_price_range', 'ask_price_range'),
+    ('ask_price_range', 'ask_specific_requirements'),
+    ('ask_specific_requirements', 'make_recommendation'),
+    ('make_recommendation', 'no_match'),
+    ('no_match', 'changes'),
+    ('changes', 'changes'),
+    ('make_recommendation', 'select_recommendation'),
+    ('select_recommendation', 'select_recommendation'),
+    ('select_recommendation', 'request_further_details'),
+    ('request_further_details', 'welcome'),  # Restart
+    ('request_further_details', 'make_recommendation'),  # Reqalts
+    ('request_further_details', 'provide_address'),
+    ('provide_address', 'provide_postalcode'),
+    ('provide_postalcode', GOODBYE),
+]
+
+
+def next_states(next_state, state):
+    """The states an entry can move to, None stays in the state."""
+    if next_state is None:
+        return (state,)
+    if isinstance(next_state, tuple):
+        return next_state
+    return (next_state,)
+
+
+def edges(transitions=TRANSITIONS):
+    """Returns {(state, next state): [dialog acts]} for every transition in the table."""
+    result = {}
+    for state, entries in transitions.items():
+        for acts, (handler, text, next_state) in entries.items():
+            for target in next_states(next_state, state):
+                result.setdefault((state, target), []).extend(acts if isinstance(acts, tuple) else [acts])
+    return result
+
+
+def validate(transitions=TRANSITIONS, handlers=None):
+    """Raises ValueError when an entry moves to an undefined state or names a handler that handlers does not have."""
+    for state, entries in transitions.items():
+        for acts, (handler, text, next_state) in entries.items():
+            for target in next_states(next_state, state):
+                if target not in transitions:
+                    raise ValueError(f"Transition {state} {acts} moves to undefined state {target}")
+            if handler is not None and handlers is not None and not callable(getattr(handlers, handler, None)):
+                raise ValueError(f"Transition {state} {acts} names missing handler {handler}")
+            if text is not None and len(text) != 2:
+                raise ValueError(f"Transition {state} {acts} text is not an (efficient, conversational) pair")
+
+
+def unreachable_states(transitions=TRANSITIONS, entry_states=ENTRY_STATES):
+    """States that no transition leads to from the entry states."""
+    successors = {}
+    for state, target in edges(transitions):
+        successors.setdefault(state, set()).add(target)
+
+    seen = set(entry_states)
+    queue = deque(entry_states)
+    while queue:
+        for target in successors.get(queue.popleft(), ()):
+            if target not in seen:
+                seen.add(target)
+                queue.append(target)
+    return [state for state in transitions if state not in seen]
+
+
+def diagram_differences(transitions=TRANSITIONS):
+    """Edges of state_transition_diagram.png that the table does not implement."""
+    implemented = edges(transitions)
+    return [edge for edge in DIAGRAM_EDGES if edge not in implemented]
+
+
+def compile_transitions(transitions=TRANSITIONS, handlers=None):
+    """
+    Validates the table and compiles it into {state: ({dialog act: entry}, default)}, an entry is
+    (handler name, text, next state) with None for a dynamic next state. The handlers are looked up by name on the
+    dialog manager at call time, so subclasses can override them.
+    """
+    validate(transitions, handlers)
+    dispatch = {}
+    for state, entries in transitions.items():
+        by_act = {}
+        default = (None, None, None)
+        for acts, (handler, text, next_state) in entries.items():
+            entry = (handler, text, next_state if isinstance(next_state, str) else None)
+            if acts == ANY:
+                default = entry
+            else:
+                for act in (acts if isinstance(acts, tuple) else (acts,)):
+                    by_act[act] = entry
+        dispatch[state] = (by_act, default)
+    return dispatch
+
+
+def to_dot(transitions=TRANSITIONS):
+    """Graphviz source of the transition table, dynamic transitions are dashed."""
+    lines = ['digraph dialog {', '    rankdir=TB;', '    node [shape=box];']
+    diagram_numbers = {state: number for number, state in DIAGRAM_STATES.items()}
+    for state in transitions:
+        label = f"{diagram_numbers[state]}. {state}" if state in diagram_numbers else state
+        lines.append(f'    "{state}" [label="{label}"];')
+    for state, entries in transitions.items():
+        for acts, (handler, text, next_state) in entries.items():
+            label = ', '.join(acts) if isinstance(acts, tuple) else acts
+            style = ' style=dashed' if isinstance(next_state, tuple) else ''
+            for target in next_states(next_state, state):
+                lines.append(f'    "{state}" -> "{target}" [label="{label}"{style}];')
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == "__main__":
+    validate(TRANSITIONS)
+    print(f"{len(TRANSITIONS)} states, {sum(len(entries) for entries in TRANSITIONS.values())} table entries")
+    print(f"Unreachable states: {unreachable_states() or 'none'}")
+    for state, target in diagram_differences():
+        print(f"In the diagram but not implemented: {state} -> {target}")
+
+    with open('state_transition_diagram.dot', 'w') as f:
+        f.write(to_dot())
+    print("Wrote state_transition_diagram.dot, render it with: dot -Tpng state_transition_diagram.dot -o diagram.png")
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from async_dialog_system import AsyncDialogManager, ScriptedTransport
+from batch_classifier import MicroBatchClassifier
+from memory_store import MemoryLog
+
+
+def classify_batch(utterances):
+    return ['hello' if utterance.startswith('hi') else 'null' for utterance in utterances]
+
+
+def test_classifies_concurrent_requests_in_batches():
+    classifier = MicroBatchClassifier(classify_batch, max_wait=0.05)
+    futures = [classifier.submit(utterance) for utterance in ['hi', 'what', 'hi there'] * 10]
+    assert [future.result(5) for future in futures] == classify_batch(['hi', 'what', 'hi there'] * 10)
+    classifier.close()
+    assert classifier.classified == 30
+    assert classifier.batches < 30
+
+
+def test_submit_after_close_raises():
+    classifier = MicroBatchClassifier(classify_batch)
+    classifier.close()
+    classifier.close()
+    with pytest.raises(RuntimeError):
+        classifier.submit('hi')
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    def failing(utterances):
+        raise ValueError("no model")
+
+    classifier = MicroBatchClassifier(failing)
+    with pytest.raises(ValueError):
+        classifier.classify('hi', timeout=5)
+    classifier.close()
+
+
+def test_async_dialogs_share_the_batcher(tmp_path):
+    classifier = MicroBatchClassifier(classify_batch, max_wait=0.05)
+    memory_backend = MemoryLog(str(tmp_path / 'memory.jsonl'))
+    dialogs = [AsyncDialogManager(1, 0, "efficient", False, False, memory_backend=memory_backend,
+                                  transport=ScriptedTransport(['hi']), classifier=classifier) for _ in range(5)]
+
+    async def run_all():
+        await asyncio.gather(*(dialog.run() for dialog in dialogs))
+
+    asyncio.run(run_all())
+    classifier.close()
+    # 'hello' in the welcome state asks for the location
+    assert all(dialog.session.state == 'ask_location' for dialog in dialogs)
+    assert classifier.classified == 5
+    assert classifier.batches < 5
@@ -0,0 +1,51 @@
+import pytest
+from algorithm import TextProcessor
+
+
+@pytest.mark.parametrize('sentence, phrase', [
+    ('i want asian oriental food', 'asian oriental'),
+    ('modern european food please', 'modern european'),
+    ('is there a north american restaurant', 'north american'),
+    ('i want modern european', 'modern european'),
+])
+def test_multi_word_values_are_one_match(sentence, phrase):
+    text_processor = TextProcessor()
+    assert text_processor.categorize_words(sentence) == [(phrase, 'food_type')]
+    # The words of the phrase are not learned on their own
+    assert len(text_processor.dynamic_dict['food_type']) == 0
+
+
+def test_longest_phrase_wins_and_location_still_matches():
+    assert TextProcessor().categorize_words('north american food in the north') == [
+        ('north', 'location'), ('north american', 'food_type')]
+    assert TextProcessor().categorize_words('i want asian oriental food in the centre') == [
+        ('centre', 'location'), ('asian oriental', 'food_type')]
+
+
+def test_in_the_pattern_only_matches_known_locations():
+    assert TextProcessor().categorize_words('in the east') == [('east', 'location')]
+    assert TextProcessor().categorize_words('something in the middle') == []
+
+
+def test_food_pattern_learns_new_food_types():
+    text_processor = TextProcessor()
+    assert text_processor.categorize_words('i want gibberish food') == [('gibberish', 'food_type')]
+    assert 'gibberish' in text_processor.dynamic_dict['food_type']
+    assert text_processor.categorize_words('the food') == []
+    assert text_processor.categorize_words('food') == []
+
+
+def test_priced_pattern_learns_new_price_ranges():
+    text_processor = TextProcessor()
+    assert text_processor.categorize_words('a moderately priced restaurant in the west') == [
+        ('west', 'location'), ('moderately', 'price_range')]
+    assert 'moderately' in text_processor.dynamic_dict['price_range']
+    # Needs a word before the price, like the original pattern did
+    assert text_processor.categorize_words('xyzzy priced') == []
+    assert 'xyzzy' not in text_processor.dynamic_dict['price_range']
+    assert text_processor.categorize_words('priced') == []
+
+
+def test_matches_are_ordered_location_food_price():
+    assert TextProcessor().categorize_words('i want cheap priced italian food in the south') == [
+        ('south', 'location'), ('italian', 'food_type'), ('cheap', 'price_range')]
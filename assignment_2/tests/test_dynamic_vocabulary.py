@@ -0,0 +1,74 @@
+import pytest
+from algorithm import DynamicVocabulary, TextProcessor
+
+
+@pytest.mark.parametrize('policy', ['lfu', 'lru'])
+@pytest.mark.parametrize('capacity', [1, 2])
+def test_evicts_after_touching_every_word(policy, capacity):
+    vocabulary = DynamicVocabulary(capacity, policy)
+    words = [f"word{i}" for i in range(capacity)]
+    for word in words:
+        vocabulary.add(word)
+    for word in words:
+        assert word in vocabulary
+
+    vocabulary.add('new')
+    assert len(vocabulary.words) == capacity
+    assert 'new' in vocabulary.words
+    assert vocabulary.stats()['evictions'] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    vocabulary = DynamicVocabulary(2, 'lru')
+    vocabulary.add('old')
+    vocabulary.add('other')
+    assert 'old' in vocabulary
+    vocabulary.add('new')
+    assert set(vocabulary.words) == {'old', 'new'}
+
+
+def test_lfu_evicts_least_frequently_used():
+    vocabulary = DynamicVocabulary(2, 'lfu')
+    vocabulary.add('frequent')
+    vocabulary.add('other')
+    for _ in range(3):
+        assert 'frequent' in vocabulary
+    assert 'other' in vocabulary  # Now the most recently used, but still the least frequently used
+    vocabulary.add('new')
+    assert set(vocabulary.words) == {'frequent', 'new'}
+
+
+@pytest.mark.parametrize('policy', ['lfu', 'lru'])
+def test_matches_min_based_eviction(policy):
+    """The evicted words are the ones the old min() over (use count, last use) or last use picked."""
+    vocabulary = DynamicVocabulary(5, policy)
+    frequency, last_used, clock = {}, {}, 0
+    for step in range(2000):
+        word = f"w{(step * 7919) % 13 if step % 3 else step % 4}"
+        if step % 5 == 0:
+            vocabulary.__contains__(word)
+        else:
+            vocabulary.add(word)
+            if word not in frequency and len(frequency) >= 5:
+                key = (lambda w: last_used[w]) if policy == 'lru' else (lambda w: (frequency[w], last_used[w]))
+                victim = min(frequency, key=key)
+                del frequency[victim], last_used[victim]
+            frequency.setdefault(word, 0)
+        if word in frequency:
+            clock += 1
+            frequency[word] += 1
+            last_used[word] = clock
+        assert set(vocabulary.words) == set(frequency)
+
+
+def test_capacity_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        DynamicVocabulary(0)
+
+
+def test_text_processor_with_a_single_lru_slot():
+    text_processor = TextProcessor(dynamic_limits={'food_type': 1}, eviction_policy='lru')
+    text_processor.categorize_words('i want xyzzy food')
+    text_processor.categorize_words('i want xyzzy food')
+    assert ('plugh', 'food_type') in text_processor.categorize_words('i want plugh food')
+    assert set(text_processor.dynamic_dict['food_type'].words) == {'plugh'}
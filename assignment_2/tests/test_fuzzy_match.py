@@ -0,0 +1,25 @@
+from algorithm import FuzzyMatchCache, TextProcessor
+
+UTTERANCES = ['i want chinse food in the centre', 'cheep restaurant in the sauth', 'i want xyzzy food',
+              'xyzzi please', 'xyzzi please', 'something in the nort', 'chinse food', 'plugh food', 'xyzzi please']
+
+
+def parse_all(text_processor):
+    return [text_processor.categorize_words(utterance) for utterance in UTTERANCES * 3]
+
+
+def test_cache_does_not_change_matches_or_vocabulary_stats():
+    cached = TextProcessor(dynamic_limits={'food_type': 2})
+    uncached = TextProcessor(dynamic_limits={'food_type': 2}, fuzzy_cache=FuzzyMatchCache(maxsize=0))
+    assert parse_all(cached) == parse_all(uncached)
+    assert cached.fuzzy_cache.stats()['hits'] > 0
+    assert cached.vocabulary_stats() == uncached.vocabulary_stats()
+    for category, vocabulary in cached.dynamic_dict.items():
+        assert vocabulary.frequency == uncached.dynamic_dict[category].frequency
+
+
+def test_key_changes_with_the_vocabulary_version():
+    text_processor = TextProcessor()
+    assert text_processor.fuzzy_match('xyzzi', 'food_type') is None
+    text_processor.dynamic_dict['food_type'].add('xyzzy')
+    assert text_processor.fuzzy_match('xyzzi', 'food_type') == 'xyzzy'
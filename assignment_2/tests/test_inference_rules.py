@@ -0,0 +1,30 @@
+import itertools
+import pandas as pd
+import pytest
+from benchmark_inference_rules import apply_inference_rules_row
+from memory_store import MemoryLog
+from restaurant_selector import RestaurantSelector
+
+CSV_PATH = '../data/restaurant_info.csv'
+
+
+@pytest.fixture
+def selector(tmp_path):
+    return RestaurantSelector(CSV_PATH, memory_backend=MemoryLog(f"{tmp_path}/memory.jsonl"))
+
+
+def assert_same_as_row_wise(selector, restaurants_df):
+    row_wise = restaurants_df.apply(apply_inference_rules_row, axis=1)
+    vectorized = selector.apply_inference_rules(restaurants_df)
+    pd.testing.assert_frame_equal(row_wise.astype(object), vectorized[row_wise.columns].astype(object))
+
+
+def test_restaurant_table(selector):
+    assert_same_as_row_wise(selector, pd.read_csv(CSV_PATH))
+
+
+def test_every_combination_of_rule_inputs(selector):
+    combinations = itertools.product(['cheap', 'moderate', 'expensive'], ['romanian', 'chinese'], ['calm', 'busy'],
+                                     ['short', 'long'])
+    restaurants_df = pd.DataFrame(combinations, columns=['pricerange', 'food', 'crowdedness', 'length_of_stay'])
+    assert_same_as_row_wise(selector, restaurants_df)
@@ -0,0 +1,55 @@
+import json
+import multiprocessing
+import os
+import pytest
+import memory_store
+from memory_store import MemoryLog, SQLiteMemory
+
+
+def migrate_in_process(log_path, json_path, start):
+    start.wait()
+    MemoryLog(log_path).migrate(json_path)
+
+
+def test_concurrent_migrations_import_the_old_records_once(tmp_path):
+    json_path = str(tmp_path / 'memory.json')
+    log_path = str(tmp_path / 'memory.jsonl')
+    with open(json_path, 'w') as f:
+        json.dump({f"2024-01-01 00:00:0{i}": {'food_type': 'chinese', 'area': 'centre'} for i in range(5)}, f)
+
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    processes = [context.Process(target=migrate_in_process, args=(log_path, json_path, start)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    assert len(MemoryLog(log_path).read_all()) == 5
+    assert os.path.exists(json_path + '.migrated')
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def without_user_id(records):
+    # The log stores the user in the record itself, SQLite in its own column
+    return [{key: value for key, value in record.items() if key != 'user_id'} for record in records]
+
+
+@pytest.mark.parametrize('scan_block', [1, 3, memory_store.SCAN_BLOCK])
+def test_log_and_sqlite_return_the_same_records_per_user(tmp_path, monkeypatch, scan_block):
+    monkeypatch.setattr(memory_store, 'SCAN_BLOCK', scan_block)
+    memory_log = MemoryLog(str(tmp_path / 'memory.jsonl'))
+    sqlite_memory = SQLiteMemory(str(tmp_path / 'memory.db'))
+    users = ['default', 'alice', 'bob', 'alice', 'alice', 'default', 'bob', 'alice']
+    for i, user_id in enumerate(users * 3):
+        records = [{'timestamp': f"2024-01-01 00:{i:02}:0{j}", 'food_type': f"food {i}", 'area': 'centre'}
+                   for j in range(1 + i % 2)]
+        memory_log.append_many(records, user_id)
+        sqlite_memory.append_many(records, user_id)
+
+    for user_id in ['default', 'alice', 'bob', 'nobody']:
+        for n in [0, 1, 2, 3, 5, 100]:
+            assert without_user_id(memory_log.last(n, user_id)) == sqlite_memory.last(n, user_id), (user_id, n)
+    sqlite_memory.close()
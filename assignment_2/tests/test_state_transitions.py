@@ -0,0 +1,98 @@
+"""
+Pins the outcome of every state, dialog act and utterance of the compiled transition table.
+The snapshot was recorded from the if/elif chain handle_state used to be, except for the restart and reqalts edges
+after a recommendation and no_match/negate ending in goodbye, which the chain lacked.
+Regenerate it with `python tests/test_state_transitions.py` only when a transition changes on purpose.
+"""
+
+import json
+import os
+import sys
+import numpy as np
+import pytest
+
+SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'state_transitions.json')
+STYLES = ('efficient', 'conversational')
+ACTS = ['ack', 'affirm', 'bye', 'confirm', 'deny', 'hello', 'inform', 'negate', 'null', 'repeat', 'reqalts',
+        'reqmore', 'request', 'restart', 'thankyou']
+UTTERANCES = ['', 'cheap chinese food in the centre', 'romantic', '1', '2', 'none', 'dontcare', 'expensive']
+
+
+def outcome(dialog, dialog_act, utterance):
+    np.random.seed(0)  # make_recommendation samples restaurants
+    dialog.handle_state(dialog_act, utterance)
+    return dialog.state, dialog.take_responses(), dialog.preferences, dialog.response, dialog.changes_counter
+
+
+def record(selector):
+    from benchmark_state_machine import dialog_for
+    from state_machine import GOODBYE, TRANSITIONS
+
+    outcomes, transitions = [], {}
+    for state in TRANSITIONS:
+        if state == GOODBYE:
+            continue
+        for dialog_act in ACTS:
+            for style in STYLES:
+                indices = []
+                for utterance in UTTERANCES:
+                    state_after, responses, preferences, response, changes_counter = outcome(
+                        dialog_for(selector, state, style), dialog_act, utterance)
+                    # Pairs, extract_preferences can store a None key
+                    result = [state_after, responses, list(map(list, preferences.items())), response, changes_counter]
+                    if result not in outcomes:
+                        outcomes.append(result)
+                    indices.append(outcomes.index(result))
+                transitions.setdefault(state, {}).setdefault(dialog_act, {})[style] = indices
+    return {'utterances': UTTERANCES, 'outcomes': outcomes, 'transitions': transitions}
+
+
+def make_selector(memory_dir):
+    from memory_store import MemoryLog
+    from restaurant_selector import RestaurantSelector
+    return RestaurantSelector('../data/restaurant_info.csv', memory_backend=MemoryLog(f"{memory_dir}/memory.jsonl"))
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    with open(SNAPSHOT, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def test_transitions_match_the_snapshot(snapshot, tmp_path):
+    current = record(make_selector(tmp_path))
+    assert current['utterances'] == snapshot['utterances']
+    for state, acts in snapshot['transitions'].items():
+        for dialog_act, styles in acts.items():
+            for style, indices in styles.items():
+                for utterance, expected, actual in zip(
+                        snapshot['utterances'], indices, current['transitions'][state][dialog_act][style]):
+                    assert current['outcomes'][actual] == snapshot['outcomes'][expected], \
+                        (state, dialog_act, style, utterance)
+    assert current['transitions'].keys() == snapshot['transitions'].keys()
+
+
+if __name__ == '__main__':
+    import tempfile
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path[:0] = [os.path.dirname(os.getcwd()), os.getcwd()]
+    with tempfile.TemporaryDirectory() as memory_dir:
+        snapshot = record(make_selector(memory_dir))
+    # One outcome and one list of outcome indices per line, so changes show up as small diffs
+    lines = [f'{{"utterances": {json.dumps(snapshot["utterances"])},', ' "outcomes": [']
+    lines += [f'  {json.dumps(result)},' for result in snapshot['outcomes']]
+    lines[-1] = lines[-1].rstrip(',')
+    lines.append(' ],')
+    lines.append(' "transitions": {')
+    for state, acts in snapshot['transitions'].items():
+        lines.append(f'  {json.dumps(state)}: {{')
+        for dialog_act, styles in acts.items():
+            lines.append(f'   {json.dumps(dialog_act)}: {json.dumps(styles)},')
+        lines[-1] = lines[-1].rstrip(',')
+        lines.append('  },')
+    lines[-1] = lines[-1].rstrip(',')
+    lines.append(' }')
+    lines.append('}')
+    with open(SNAPSHOT, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    print(f"Recorded {len(snapshot['outcomes'])} outcomes to {SNAPSHOT}")